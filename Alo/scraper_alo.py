@@ -7,12 +7,11 @@ import os
 import shutil
 from datetime import datetime, timedelta
 
-import requests
-from bs4 import BeautifulSoup
-
 import constants
-from model import ShortArticle, Article, Comment
-from scraper import Scraper
+from cleanup import Rule
+from model import ShortArticle, Article, CommentTree
+from retry import PermanentError
+from scraper import Scraper, strainer
 
 logging.basicConfig(level=logging.INFO,
                     format='%(asctime)s - %(levelname)s - %(message)s',
@@ -24,6 +23,17 @@ class ScraperAlo(Scraper):
     """
     Scraper class for Alo news.
     """
+    # Elements needed from search result and comment pages
+    _articles_strainer = strainer('div', 'categoryList__details')
+    _comments_strainer = strainer('li', id='main-comment')
+    # Tags removed from article text
+    _cleanup_rules = [
+        Rule('span', class_='image-plugin-description'),
+        Rule('div', class_='mceEditable'),
+        Rule('section', class_='asideList'),
+        Rule('blockquote'),
+        Rule('p', text=['bonus video'], ignore_case=True),
+    ]
 
     def __init__(self):
         site_name = 'Alo'
@@ -35,15 +45,14 @@ class ScraperAlo(Scraper):
         :return:
         """
         keywords = constants.keywords_serbian if lang == 'sr' else constants.keywords
-        for keyword in keywords:
+        for keyword in self._planner.queries(keywords):
             logging.info("Keyword: %s" % keyword)
             page_num = 1
             while True:
                 logging.info("%d" % page_num)
                 articles_list, stop_iteration = self._get_articles_list(keyword, page_num)
-                self._articles.extend(articles_list)
-                # Stop iteration if article is older than min date
-                if stop_iteration:
+                # Stop iteration if there are no more results or pages are stale
+                if self._add_search_page(self._articles, keyword, articles_list) or stop_iteration:
                     break
                 page_num += 1
         extended = self.extend_short_articles(newspaper="alo")
@@ -55,11 +64,12 @@ class ScraperAlo(Scraper):
 
     def _get_articles_list(self, keyword, page_num, **kwargs):
         url = self._generic_url.format(keyword, page_num)
-        response = requests.get(url)
+        response = self._client.get(url)
 
         if "Nema rezultata za ovu pretragu" in response.content.decode('utf-8'):
             return [], True
-        article_divs = BeautifulSoup(response.content, 'html.parser').find_all('div', class_='categoryList__details')
+        soup = self._parse_html(response.content, self._articles_strainer)
+        article_divs = soup.find_all('div', class_='categoryList__details')
         articles = []
         for article_div in article_divs:
             article_date, article_url = article_div.find('ul').findAll('li')
@@ -71,7 +81,7 @@ class ScraperAlo(Scraper):
             # Get article title
             article_title = article_div.find('h2').find('span').text.strip()
 
-            if not constants.MIN_DATE <= date < constants.MAX_DATE:
+            if not self._min_date <= date < self._max_date:
                 continue
 
             articles.append(
@@ -81,82 +91,74 @@ class ScraperAlo(Scraper):
 
     def _get_full_article(self, short_article):
         url = short_article.url
-        response = requests.get(url)
-        soup = BeautifulSoup(response.content, 'html.parser')
+        response = self._client.get(url)
+        soup = self._parse_html(response.content)
         try:
             text = self.get_formatted_article(text=soup.find('div', {'id': 'newsContent'}),
                                               lead=soup.find('p', class_='lead'))
             author_tag = soup.find('span', attrs={'class': 'article-author'})
             author = author_tag.text if True else ""
 
-            comments = []
+            comment_tree = CommentTree()
             # TODO: scrape title and date if not exists
             total_comments = int(soup.find('div', {'class': 'all-comments-link'}).text.split(" ")[-1][1:-1])
             if total_comments > 0:
                 tag = soup.find('li', {'id': 'main-comment'})
                 # Add first comment and it sub-comments from page
-                c, last_comment_id = self._get_comment_and_sub_comments(tag)
-                comments.extend(c)
+                last_comment_id = self._add_comment_and_sub_comments(comment_tree, tag)
                 article_id = soup.find('input', {'type': 'hidden', 'id': 'articleId'})['value']
                 # Add all other comments
-                comments.extend(self._get_comments(article_id=article_id, last_comment_id=last_comment_id))
+                self._get_comments(comment_tree=comment_tree, article_id=article_id, last_comment_id=last_comment_id)
+            comments = comment_tree.comments
             # Check if number on comments on page and scraped number of comments is equal
             if total_comments != len(comments) and len(comments) > 0:
                 logging.warning("Scraped wrong number of comments: %d/%d" % (len(comments), total_comments))
 
             full_article = Article(short_article, text, author, comments)
             return full_article
-        except AttributeError:
-            with open(r'log/alo_errors.txt', 'a') as f:
-                f.write("%s\n" % url)
-            logging.error("Invalid URL: %s" % url)
-        return None
+        except AttributeError as e:
+            raise PermanentError("Invalid article page: %s" % url) from e
 
     def _get_comments(self, **kwargs):
         """
         Scrape all comments, except first one.
         :param kwargs:
+            - comment_tree: CommentTree that already contains the first comment
             - last_comment_id: id of the first comment
             - article_id: id of the article
-        :return:
+        :return: list of all comments
         """
-        comment_counter = 1
+        comment_tree = kwargs['comment_tree']
         last_comment_id = kwargs['last_comment_id']
-        comments = []
         while True:
             url = self._comments_url.format(kwargs['article_id'], last_comment_id)
-            response = requests.get(url)
+            response = self._client.get(url)
             if not response.content:
-                return comments
-            comment_divs = BeautifulSoup(response.content, 'html.parser').find_all('li', {'id': 'main-comment'})
+                return comment_tree.comments
+            soup = self._parse_html(response.content, self._comments_strainer)
+            comment_divs = soup.find_all('li', {'id': 'main-comment'})
             for comment_tag in comment_divs:
-                comment_counter += 1
                 # Scrape comment and it sub-comments
-                c, last_comment_id = self._get_comment_and_sub_comments(comment_tag, comment_counter)
-                comments.extend(c)
+                last_comment_id = self._add_comment_and_sub_comments(comment_tree, comment_tag)
 
-    def _get_comment_and_sub_comments(self, tag, comment_counter=0):
+    def _add_comment_and_sub_comments(self, comment_tree, tag):
         """
-        Scrape comment within tag, and it sub-comments.
+        Scrape comment within tag, and it sub-comments, and add them to the comment tree.
+        :param comment_tree: CommentTree
         :param tag: div that contains comment
-        :param comment_counter: id of the last comment
-        :return: list of comments, id of the last comment
+        :return: on-page id of the comment
         """
         comment_id, comment_text, sub_comments = self._get_comment(tag)
         # Add top-level comment
-        comments = [Comment("%s" % comment_counter, '', comment_text)]
-        sub_comment_counter = 1
+        top_comment_id = comment_tree.add(comment_text)
         # Add sub-comments, if any
         if sub_comments:
             sub_comment_tags = tag.find_all('li', {'id': 'reply-comment'})
             for sub_comment_tag in sub_comment_tags:
                 _, sub_comment_text, _ = self._get_comment(sub_comment_tag)
-                comments.append(
-                    Comment("%s-%s" % (comment_counter, sub_comment_counter), "%s" % comment_counter,
-                            sub_comment_text))
-                sub_comment_counter += 1
+                comment_tree.add(sub_comment_text, top_comment_id)
 
-        return comments, comment_id
+        return comment_id
 
     def _get_comment(self, tag):
         """
@@ -169,28 +171,6 @@ class ScraperAlo(Scraper):
         sub_comments = tag.find('li', {'id': 'reply-comment'}) is not None
         return comment_id, comment_text, sub_comments
 
-    def format_text(self, text):
-        """
-        Format XML text.
-        :param text:
-        :return:
-        """
-
-        for tag in text.findAll('span', class_='image-plugin-description'):
-            tag.decompose()
-        for tag in text.findAll('div', class_='mceEditable'):
-            tag.decompose()
-        for tag in text.findAll('section', class_='asideList'):
-            tag.decompose()
-        for tag in text.findAll('blockquote'):
-            tag.decompose()
-        for tag in text.findAll('p'):
-            tag_text = tag.text.lower()
-            if 'bonus video' in tag_text:
-                tag.decompose()
-        cleared = super().format_text(text)
-        return cleared
-
     @staticmethod
     def remove_thrash_articles():
         """
@@ -1,12 +1,11 @@
 import logging
 from datetime import datetime
 
-import requests
-from bs4 import BeautifulSoup
-
 import constants
+from cleanup import Rule
 from model import ShortArticle, Article
-from scraper import Scraper
+from retry import PermanentError
+from scraper import Scraper, strainer
 
 logging.basicConfig(level=logging.INFO,
                     format='%(asctime)s - %(levelname)s - %(message)s',
@@ -18,6 +17,17 @@ class ScraperDelo(Scraper):
     """
     Scraper class for Slovenske novice news
     """
+    # Elements needed from search result pages
+    _pages_strainer = strainer('a', 'Pagination-link last')
+    _articles_strainer = strainer('div', 'itemTitle', 'itemDatePublished')
+    # Tags removed from article text
+    _cleanup_rules = [
+        Rule('p', class_='d_author'),
+        Rule('span', class_='ArticleImage-source'),
+        Rule('div', class_='ArticleImage-foto'),
+        Rule('div', class_='itemImageDesc'),
+        Rule('div', class_='itemInfoboxText'),
+    ]
 
     def __init__(self):
         site_name = 'Delo'
@@ -28,23 +38,11 @@ class ScraperDelo(Scraper):
         Return list of articles (ListArticle objects) within defined range.
         :return:
         """
-        for keyword in constants.keywords:
-            logging.info("Keyword: %s" % keyword)
-            for year in range(constants.MIN_DATE.year, constants.MAX_DATE.year):
-                logging.info("Year: %s" % year)
-                number_of_pages = self._get_keyword_number_of_pages(keyword, year=year)
-                logging.info("Number of pages: %s" % number_of_pages)
-                for page_num in range(1, number_of_pages + 1):
-                    logging.info("%d" % page_num)
-                    articles_list, stop_iteration = self._get_articles_list(keyword, page_num, year=year)
-                    self._articles.extend(articles_list)
-                    # Stop iteration if article is older than min date
-                    if stop_iteration:
-                        break
+        self._articles.extend(self._search_windows(self._planner.queries(constants.keywords)))
 
     def _get_keyword_number_of_pages(self, keyword, **kwargs):
-        response = requests.get(self._generic_url.format(keyword, kwargs['year'], 1))
-        soup = BeautifulSoup(response.content, 'html.parser')
+        response = self._client.get(self._generic_url.format(keyword, kwargs['window'][0].year, 1))
+        soup = self._parse_html(response.content, self._pages_strainer)
         try:
             pages = soup.find("a", class_="Pagination-link last")['data-page']
         except TypeError:
@@ -52,9 +50,9 @@ class ScraperDelo(Scraper):
         return int(pages)
 
     def _get_articles_list(self, keyword, page_num, **kwargs):
-        url = self._generic_url.format(keyword, kwargs['year'], page_num)
-        response = requests.get(url)
-        soup = BeautifulSoup(response.content, 'html.parser')
+        url = self._generic_url.format(keyword, kwargs['window'][0].year, page_num)
+        response = self._client.get(url)
+        soup = self._parse_html(response.content, self._articles_strainer)
         articles = []
 
         article_titles_divs = soup.find_all('div', class_="itemTitle")
@@ -64,6 +62,9 @@ class ScraperDelo(Scraper):
             article_title = title_div.find('h2').text.replace('»', '').replace('«', '')
             article_url = "https://www.delo.si%s" % title_div.find('a')['href']
             date = datetime.strptime(date_div.text.split('Objavljeno')[-1].strip(), '%d.%m.%Y %H:%M')
+            # Search returns the whole year, window may be clipped to the date range
+            if not kwargs['window'][0] <= date < kwargs['window'][1]:
+                continue
 
             articles.append(
                 ShortArticle(keyword=keyword, url=article_url.strip(), title=article_title.strip(),
@@ -73,8 +74,8 @@ class ScraperDelo(Scraper):
     def _get_full_article(self, short_article):
         url = short_article.url
         try:
-            response = requests.get(url)
-            soup = BeautifulSoup(response.content, 'html.parser')
+            response = self._client.get(url)
+            soup = self._parse_html(response.content)
             text = self.get_formatted_article(text=soup.find('div', class_='itemFullText'),
                                               lead=soup.find('h2', class_='itemSubtitle'))
             author = soup.find('div', class_='col-authorname')
@@ -90,13 +91,12 @@ class ScraperDelo(Scraper):
                 logging.info('Total comments: %d' % len(comments))
             full_article = Article(short_article, text, author, comments)
             return full_article
-        except (AttributeError, requests.exceptions.ConnectionError):
-            logging.error("Invalid URL: %s" % url)
-        return None
+        except AttributeError as e:
+            raise PermanentError("Invalid article page: %s" % url) from e
 
     def format_text(self, text):
         """
-        Format XML text.
+        Format XML text. Images and their captions are removed before cleanup rules are applied.
         :param text:
         :return:
         """
@@ -119,20 +119,4 @@ class ScraperDelo(Scraper):
                     tag.decompose()
             if tag.next is not None and 'Foto' in tag.next:
                 tag.decompose()
-
-        for tag in text.findAll('p', class_='d_author'):
-            tag.decompose()
-        for tag in text.findAll('span', class_='ArticleImage-source'):
-            tag.decompose()
-        for tag in text.findAll('div', class_='ArticleImage-foto'):
-            tag.decompose()
-        for tag in text.findAll('div', class_='itemImageDesc'):
-            tag.decompose()
-        for tag in text.findAll('div', class_='itemInfoboxText'):
-            tag.decompose()
-        for tag in text.findAll('img'):
-            if tag.next.next.name == 'p':
-                if 'Foto' in tag.next.next.text:
-                    tag.decompose()
-        cleared = super().format_text(text)
-        return cleared
+        return super().format_text(text)
@@ -1,12 +1,12 @@
 import json
 import logging
 from datetime import datetime
-
-import requests
-from bs4 import BeautifulSoup
+from math import ceil
 
 import constants
+from cleanup import Rule
 from model import ShortArticle, Article
+from retry import PermanentError
 from scraper import Scraper
 
 logging.basicConfig(level=logging.INFO,
@@ -19,34 +19,39 @@ class ScraperDnevnik(Scraper):
     """
     Scraper class for Slovenske novice news
     """
+    # Tags removed from article text
+    _cleanup_rules = [
+        Rule('div', class_='gallery-slider'),
+        Rule('p', class_='image-caption'),
+        Rule('blockquote', class_='twitter-tweet'),
+    ]
+    # Number of results on a page of the API, limit of the search URL
+    _page_size = 60
+    # The API takes any date range, so the whole range is searched at once, and only windows whose results may be cut
+    # off at deep offsets are halved. The cut-off is assumed to happen after 10000 results.
+    _window_size = None
+    _max_pages = 10000 // _page_size
 
     def __init__(self):
         site_name = 'Dnevnik'
         super().__init__(site_name)
+        # First page of each search, loaded when its number of pages is requested. Key: (keyword, window)
+        self._first_pages = {}
 
     def _get_short_articles(self, lang):
-        for keyword in constants.keywords:
-            logging.info("Keyword: %s" % keyword)
-            offset = 0
-            url = self._generic_url.format(keyword, constants.MIN_DATE.strftime("%Y-%m-%dT%H:%M:%S"),
-                                           constants.MAX_DATE.strftime("%Y-%m-%dT%H:%M:%S"), offset)
-
-            while True:
-                response = requests.get(url)
-                json_response = json.loads(response.content.decode('utf-8'))
-                articles_list = self._get_articles_list(keyword, json_response=json_response)
-                self._articles.extend(articles_list)
-                url = json_response['meta']['next']
-                if url == "":
-                    break
-                else:
-                    offset += 60
-                    url = self._generic_url.format(keyword, constants.MIN_DATE.strftime("%Y-%m-%dT%H:%M:%S"),
-                                                   constants.MAX_DATE.strftime("%Y-%m-%dT%H:%M:%S"), offset)
-                logging.info("%d/%d" % (offset, json_response['meta']['total_count']))
-
-    def _get_articles_list(self, keyword, **kwargs):
-        json_response = kwargs['json_response']
+        self._articles.extend(self._search_windows(self._planner.queries(constants.keywords)))
+        # First pages of windows that were halved are never used
+        self._first_pages.clear()
+
+    def _get_keyword_number_of_pages(self, keyword, **kwargs):
+        json_response = self._get_search_results(keyword, kwargs['window'], 0)
+        self._first_pages[(keyword, kwargs['window'])] = json_response
+        return ceil(json_response['meta']['total_count'] / self._page_size)
+
+    def _get_articles_list(self, keyword, page_num, **kwargs):
+        json_response = self._first_pages.pop((keyword, kwargs['window']), None) if page_num == 1 else None
+        if json_response is None:
+            json_response = self._get_search_results(keyword, kwargs['window'], (page_num - 1) * self._page_size)
         articles = []
 
         for article in json_response['objects']:
@@ -57,12 +62,25 @@ class ScraperDnevnik(Scraper):
             articles.append(
                 ShortArticle(keyword=keyword, url=article_url.strip(), title=article_title.strip(),
                              time=date.strftime('%Y-%m-%d'), site_name=self._site_name))
-        return articles
+        return articles, False
+
+    def _get_search_results(self, keyword, window, offset):
+        """
+        Request page of search results from the API.
+        :param keyword: keyword
+        :param window: (start, end) pair of datetime, articles published within it are searched
+        :param offset: number of results before the page
+        :return: JSON response
+        """
+        url = self._generic_url.format(keyword, window[0].strftime("%Y-%m-%dT%H:%M:%S"),
+                                       window[1].strftime("%Y-%m-%dT%H:%M:%S"), offset)
+        response = self._client.get(url)
+        return json.loads(response.content.decode('utf-8'))
 
     def _get_full_article(self, short_article):
         url = short_article.url
-        response = requests.get(url)
-        soup = BeautifulSoup(response.content, 'html.parser')
+        response = self._client.get(url)
+        soup = self._parse_html(response.content)
 
         if "article-lock" in response.content.decode('utf-8'):
             logging.error("Pay-wall: %s" % url)
@@ -84,26 +102,18 @@ class ScraperDnevnik(Scraper):
             comments = self._get_comments()
             full_article = Article(short_article, text, author, comments)
             return full_article
-        except AttributeError:
-            logging.error("Invalid URL: %s" % url)
-        return None
+        except AttributeError as e:
+            raise PermanentError("Invalid article page: %s" % url) from e
 
     def _get_comments(self):
         return []
 
-    def format_text(self, text):
+    def _clean(self, text):
         """
-        Format XML text.
-        :param text:
+        Remove images and their captions.
+        :param text: BeautifulSoup article tag
         :return:
         """
-
-        for tag in text.findAll('div', class_='gallery-slider'):
-            tag.decompose()
-        for tag in text.findAll('p', class_='image-caption'):
-            tag.decompose()
-        for tag in text.findAll('blockquote', class_='twitter-tweet'):
-            tag.decompose()
         for tag in text.findAll('img'):
             if tag.next.text is not None and 'Foto' in tag.next.text:
                 tag.next.decompose()
@@ -112,6 +122,3 @@ class ScraperDnevnik(Scraper):
             if tag.next.next.next.text is not None and 'Foto' in tag.next.next.next.text:
                 tag.next.next.next.decompose()
             tag.decompose()
-
-        cleared = super().format_text(text)
-        return cleared
@@ -7,12 +7,10 @@ import os
 import shutil
 from datetime import datetime, timedelta
 
-import requests
-from bs4 import BeautifulSoup
-
-import constants
-from model import ShortArticle, Article, Comment
-from scraper import Scraper
+from cleanup import Cleaner, Rule
+from model import ShortArticle, Article, CommentTree
+from retry import PermanentError
+from scraper import Scraper, strainer
 
 logging.basicConfig(level=logging.INFO,
                     format='%(asctime)s - %(levelname)s - %(message)s',
@@ -24,6 +22,23 @@ class ScraperKurir(Scraper):
     """
     Scraper class for Kurir news.
     """
+    # Elements needed from search result and comment pages
+    _pages_strainer = strainer('a', 'pag_last')
+    _articles_strainer = strainer('div', 'itemContent')
+    _comments_strainer = strainer('div', 'com_comment')
+    # Tags removed from article text
+    _cleanup_rules = [
+        Rule('div', class_='wdgRelated'),
+        Rule('div', class_='articleImageCaption'),
+        Rule('div', class_='artSource'),
+        Rule('div', class_='embeddedContent'),
+        Rule('div', class_='galNfo'),
+    ]
+    # Tags removed from article text after photo credits
+    _late_cleaner = Cleaner([
+        Rule('span', attrs={'itemprop': 'author'}),
+        Rule('span', attrs={'itemprop': 'publisher'}),
+    ])
 
     def __init__(self):
         site_name = 'Kurir'
@@ -34,26 +49,16 @@ class ScraperKurir(Scraper):
         Return list of articles (ListArticle objects) within defined range.
         :return:
         """
-        keywords = constants.keywords_serbian if lang == 'sr' else constants.keywords
-        for keyword in keywords:
-            logging.info("Keyword: %s" % keyword)
-            number_of_pages = self._get_keyword_number_of_pages(keyword)
-            logging.info("Number of pages: %s" % number_of_pages)
-            for page_num in range(1, number_of_pages + 1):
-                logging.info("%d" % page_num)
-                articles_list, stop_iteration = self._get_articles_list(keyword, page_num)
-                self._articles.extend(articles_list)
-                # Stop iteration if article is older than min date
-                if stop_iteration:
-                    break
+        super()._get_short_articles(lang)
+
         extended = self.extend_short_articles(newspaper='kurir')
         for e in extended:
             self._articles.append(
                 ShortArticle(e[1], e[0], "%s *****" % (e[0].split('/')[-1]), "None", self._site_name))
 
     def _get_keyword_number_of_pages(self, keyword, **kwargs):
-        response = requests.get(self._generic_url.format(1, keyword))
-        soup = BeautifulSoup(response.content, 'html.parser')
+        response = self._client.get(self._generic_url.format(1, keyword))
+        soup = self._parse_html(response.content, self._pages_strainer)
         try:
             pages = soup.find("a", class_="pag_last")['href'].split('/')[-1].split('?')[0]
         except TypeError:
@@ -62,8 +67,8 @@ class ScraperKurir(Scraper):
 
     def _get_articles_list(self, keyword, page_num, **kwargs):
         url = self._generic_url.format(page_num, keyword)
-        response = requests.get(url)
-        article_divs = BeautifulSoup(response.content, 'html.parser').find_all('div', class_='itemContent')
+        response = self._client.get(url)
+        article_divs = self._parse_html(response.content, self._articles_strainer).find_all('div', class_='itemContent')
         articles = []
         for article_div in article_divs:
             article_url = "https://www.kurir.rs%s" % article_div.find('a', class_='itemLnk')['href']
@@ -80,7 +85,7 @@ class ScraperKurir(Scraper):
             except AttributeError:
                 continue
 
-            if not constants.MIN_DATE <= date < constants.MAX_DATE:
+            if not self._min_date <= date < self._max_date:
                 continue
             for spn in article_div.find_all('span'):
                 spn.decompose()
@@ -92,9 +97,9 @@ class ScraperKurir(Scraper):
 
     def _get_full_article(self, short_article):
         url = short_article.url
-        response = requests.get(url)
+        response = self._client.get(url)
 
-        soup = BeautifulSoup(response.content, 'html.parser')
+        soup = self._parse_html(response.content)
         try:
             author = soup.find('span', {'itemprop': 'author'}).find('span', {'itemprop': 'name'})
             if author is None or "Foto" in author:
@@ -117,57 +122,45 @@ class ScraperKurir(Scraper):
                 logging.info('Total comments: %d' % len(comments))
             full_article = Article(short_article, text, author, comments)
             return full_article
-        except AttributeError:
-            logging.error("Invalid URL: %s" % url)
-        return None
+        except AttributeError as e:
+            raise PermanentError("Invalid article page: %s" % url) from e
 
     def _get_comments(self, id):
         page = 1
-        comment_counter = 0
-        sub_comment_counter = 1
-        comments = []
+        comment_tree = CommentTree()
+        # Replies follow the comment they reply to
+        top_comment_id = ''
         while True:
             url = self._comments_url.format(id, page)
-            response = requests.get(url)
+            response = self._client.get(url)
             if not response.content:
-                return comments
-            comment_divs = BeautifulSoup(response.content, 'html.parser').find_all('div', class_='com_comment')
+                return comment_tree.comments
+            soup = self._parse_html(response.content, self._comments_strainer)
+            comment_divs = soup.find_all('div', class_='com_comment')
             for comment_div in comment_divs:
                 comment_text = comment_div.find('div', class_='comTxt').text
                 if 'comReply' in comment_div['class']:
-                    comments.append(
-                        Comment("%s-%s" % (comment_counter, sub_comment_counter), "%s" % comment_counter, comment_text))
-                    sub_comment_counter += 1
+                    comment_tree.add(comment_text, top_comment_id)
                 else:
-                    sub_comment_counter = 1
-                    comment_counter += 1
-                    comments.append(Comment("%s" % comment_counter, '', comment_text))
+                    top_comment_id = comment_tree.add(comment_text)
             page += 1
 
-    def format_text(self, text):
+    def _clean(self, text):
         """
-        Format XML text.
-        :param text:
+        Remove photo credits and everything after them, and author and publisher.
+        :param text: BeautifulSoup article tag
         :return:
         """
-        for tag in text.findAll('div', class_='wdgRelated'):
-            tag.decompose()
-        for tag in text.findAll('div', class_='articleImageCaption'):
-            tag.decompose()
-        for tag in text.findAll('div', class_='artSource'):
-            tag.decompose()
-        for tag in text.findAll('div', class_='embeddedContent'):
-            tag.decompose()
-        for tag in text.findAll('div', class_='galNfo'):
-            tag.decompose()
-
         paragraphs = text.findAll('p')
+        # Text of each paragraph is computed once, it is needed for the paragraph and the one before it. Paragraph
+        # nested in one that was already removed has no text.
+        paragraphs_text = [tag.text.lower() for tag in paragraphs]
         decompose = False
         for i, tag in enumerate(paragraphs):
-            tag_text = tag.text.lower()
-            next_p = paragraphs[i + 1].text if i + 1 < len(paragraphs) else ""
+            tag_text = "" if tag.decomposed else paragraphs_text[i]
+            next_p = paragraphs_text[i + 1] if i + 1 < len(paragraphs) and not paragraphs[i + 1].decomposed else ""
             if ("kurir.rs" in tag_text or "kurir" in tag_text) and \
-                    ("foto" in tag_text or "foto" in next_p.lower()):
+                    ("foto" in tag_text or "foto" in next_p):
                 decompose = True
             if decompose:
                 tag.decompose()
@@ -176,13 +169,7 @@ class ScraperKurir(Scraper):
             if "foto:" in tag_text:
                 tag.decompose()
 
-        for tag in text.findAll('span', {'itemprop': 'author'}):
-            tag.decompose()
-        for tag in text.findAll('span', {'itemprop': 'publisher'}):
-            tag.decompose()
-
-        cleared = super().format_text(text)
-        return cleared
+        self._late_cleaner.clean(text)
 
     @staticmethod
     def remove_thrash_articles():
@@ -5,13 +5,15 @@ Politika newspaper scraper.
 import json
 import logging
 from datetime import datetime
+from math import ceil
 
 import requests
-from bs4 import BeautifulSoup
 
 import constants
-from model import ShortArticle, Article, Comment
-from scraper import Scraper
+from cleanup import Rule
+from model import ShortArticle, Article, CommentTree
+from retry import PermanentError
+from scraper import Scraper, strainer
 
 logging.basicConfig(level=logging.INFO,
                     format='%(asctime)s - %(levelname)s - %(message)s',
@@ -23,14 +25,23 @@ class ScraperPolitika(Scraper):
     """
     Scraper class for Politika news.
     """
+    # Elements needed from search result pages
+    _pages_strainer = strainer('div', 'pagination')
+    _articles_strainer = strainer('div', 'arial light-gray inline-block uppercase border-left px1 ml1',
+                                  'clearfix h4 bold roboto-slab mt1')
+    # Tags removed from article text
+    _cleanup_rules = [
+        Rule('div', class_='caption-title'),
+        Rule('div', class_='article-content mt3 mb3'),
+    ]
 
     def __init__(self):
         site_name = 'Politika'
         super().__init__(site_name)
 
     def _get_keyword_number_of_pages(self, keyword, **kwargs):
-        response = requests.get(self._generic_url.format(keyword, 1))
-        soup = BeautifulSoup(response.content, 'html.parser')
+        response = self._client.get(self._generic_url.format(keyword, 1))
+        soup = self._parse_html(response.content, self._pages_strainer)
         try:
             pages = soup.find("div", class_="pagination").find("ul").find_all("li")[-1].text
         except AttributeError:
@@ -39,8 +50,8 @@ class ScraperPolitika(Scraper):
 
     def _get_articles_list(self, keyword, page_num, **kwargs):
         url = self._generic_url.format(keyword, page_num)
-        response = requests.get(url)
-        soup = BeautifulSoup(response.content, 'html.parser')
+        response = self._client.get(url)
+        soup = self._parse_html(response.content, self._articles_strainer)
         articles = []
 
         date_divs = soup.find_all('div', class_="arial light-gray inline-block uppercase border-left px1 ml1")
@@ -60,9 +71,9 @@ class ScraperPolitika(Scraper):
 
             date = datetime.strptime(article_date, '%d.%m.%Y, %H:%M') if len(
                 article_date.split(',')) > 1 else datetime.strptime(article_date, '%d.%m.%Y')
-            if date >= constants.MAX_DATE:
+            if date >= self._max_date:
                 continue
-            if date < constants.MIN_DATE:
+            if date < self._min_date:
                 return articles, True
 
             articles.append(
@@ -72,129 +83,149 @@ class ScraperPolitika(Scraper):
 
     def _get_full_article(self, short_article):
         url = short_article.url
-        response = requests.get(url)
-        soup = BeautifulSoup(response.content, 'html.parser')
+        response = self._client.get(url)
+        soup = self._parse_html(response.content)
         try:
             text = self.get_formatted_article(text=soup.find('div', class_='article-content mt3 mb3'),
                                               lead=soup.find('div', class_='h4 mt0 mb2 regular roboto-slab'))
             author_tag = soup.find('meta', attrs={'name': 'author'})
             author = author_tag['content'] if 'content' in author_tag.attrs else ""
 
+            total_comments = int(soup.find('a', class_='px1 light-blue').text)
             foreign_id_tag = soup.find('form', class_='clearfix mxn1 comment-form')
             if foreign_id_tag is not None:
                 foreign_id = soup.find('form', class_='clearfix mxn1 comment-form')['data-foreign-key']
-                comments = self._get_comments(foreign_id)
+                comments = self._get_comments(foreign_id, total_comments)
             else:
                 comments = []
                 logging.warning("Foreign ID is None.")
-            total_comments = int(soup.find('a', class_='px1 light-blue').text)
             if total_comments != len(comments) and len(comments) > 0:
                 logging.warning("Scraped wrong number of comments")
             full_article = Article(short_article, text, author, comments)
             return full_article
-        except AttributeError:
-            with open(r'log/politika_errors.txt', 'a') as f:
-                f.write("%s\n" % url)
-            logging.error("Invalid URL: %s" % url)
-        return None
-
-    def _get_comments(self, foreign_id=None):
-        comments = []
-        comments_counter = 0
+        except AttributeError as e:
+            raise PermanentError("Invalid article page: %s" % url) from e
+
+    def _get_comments(self, foreign_id=None, total_comments=0):
+        """
+        Load all comments of the article. Comment pages are requested until the first missing page. The first page is
+        requested alone, later pages as many at a time (at most COMMENT_WORKERS) as the comments not loaded yet may
+        fill, so articles with few comments make no more requests than with pages requested one by one. Replies that
+        are not included in the comment pages are then loaded for all top comments concurrently.
+        :param foreign_id: Politika ID of the article
+        :param total_comments: number of comments shown on the article page
+        :return: list of Comment objects
+        """
+        json_top_comments_list = []
+        # Comments on the pages loaded so far, and on the first page, with replies included in the pages
+        loaded_comments = 0
+        page_size = None
         comments_page_counter = 0
-        while True:
-            comments_page_counter += 1
-            response = requests.get(self._comments_url.format(foreign_id, comments_page_counter))
-            if response.status_code == 404:
-                return comments
-            json_top_comments_list = json.loads(response.content)['data']
-            for json_top_comment in json_top_comments_list:
-                comments_counter += 1
-                sub_comments_counter = 0
-                top_comment = json_top_comment['Comment']
-                top_comment_original_id = top_comment['id']
-
-                top_text = top_comment['text']
-                top_comment_id = str(comments_counter)
-                parent_id = top_comment['parent_id']
-                comments.append(Comment(top_comment_id, parent_id, top_text))
-                if 'SubComment' not in json_top_comment:
-                    continue
-                else:
-                    json_sub_comments = json_top_comment['SubComment']
-                sub_comment_ids = []
-                for json_sub_comment in json_sub_comments:
-                    sub_comment_ids.append(json_sub_comment['id'])
-                    sub_comments_counter += 1
-                    sub_text = json_sub_comment['text']
-                    sub_id = "%s-%d" % (top_comment_id, sub_comments_counter)
-                    sub_parent_id = top_comment_id
-                    comments.append(Comment(sub_id, sub_parent_id, sub_text))
-                comments.extend(
-                    self._get_sub_comments(foreign_id, top_comment_original_id, sub_comment_ids, top_comment_id))
-
-    def _get_sub_comments(self, foreign_id, parent_id, sub_comment_ids, parent_local_id):
-        comments = []
+        last_page = False
+        while not last_page:
+            if page_size is None:
+                batch_size = 1
+            else:
+                remaining_pages = ceil(max(total_comments - loaded_comments, 0) / page_size)
+                batch_size = min(constants.COMMENT_WORKERS, max(1, remaining_pages))
+            page_nums = list(range(comments_page_counter + 1, comments_page_counter + 1 + batch_size))
+            responses = self._map_concurrently(lambda page_num: self._get_comments_page(foreign_id, page_num),
+                                               page_nums)
+            for response in responses:
+                if isinstance(response, Exception):
+                    raise response
+                if response.status_code == 404:
+                    last_page = True
+                    break
+                json_page = json.loads(response.content)['data']
+                json_top_comments_list.extend(json_page)
+                loaded_comments += sum(1 + len(json_comment.get('SubComment', [])) for json_comment in json_page)
+                if page_size is None:
+                    page_size = max(1, loaded_comments)
+            comments_page_counter += batch_size
+
+        sub_comments_requests = []
+        for json_top_comment in json_top_comments_list:
+            if 'SubComment' in json_top_comment:
+                sub_comment_ids = [json_sub_comment['id'] for json_sub_comment in json_top_comment['SubComment']]
+                sub_comments_requests.append((foreign_id, json_top_comment['Comment']['id'], sub_comment_ids))
+        sub_comments_lists = iter(self._map_concurrently(lambda request: self._get_sub_comments(*request),
+                                                         sub_comments_requests))
+
+        # Each top comment is followed by its replies from the comment page, and then by replies loaded later
+        comment_tree = CommentTree()
+        for json_top_comment in json_top_comments_list:
+            top_comment_id = comment_tree.add(json_top_comment['Comment']['text'])
+            if 'SubComment' not in json_top_comment:
+                continue
+            for json_sub_comment in json_top_comment['SubComment']:
+                comment_tree.add(json_sub_comment['text'], top_comment_id)
+            for sub_text in next(sub_comments_lists):
+                comment_tree.add(sub_text, top_comment_id)
+        return comment_tree.comments
+
+    def _get_comments_page(self, foreign_id, page_num):
+        """
+        Request page of comments.
+        :param foreign_id: Politika ID of the article
+        :param page_num: number of the page
+        :return: requests.Response, or exception raised by the request
+        """
+        try:
+            return self._client.get(self._comments_url.format(foreign_id, page_num))
+        except requests.exceptions.RequestException as e:
+            # Pages are requested ahead, so the error matters only if the page is before the last one
+            return e
+
+    def _get_sub_comments(self, foreign_id, parent_id, sub_comment_ids):
+        """
+        Load replies to the comment that are not included in the comment page.
+        :param foreign_id: Politika ID of the article
+        :param parent_id: Politika ID of the comment
+        :param sub_comment_ids: Politika IDs of replies included in the comment page
+        :return: list of texts of replies
+        """
+        sub_texts = []
         if len(sub_comment_ids) == 0:
-            return comments
+            return sub_texts
         page = 1
         while True:
             sub_comments_url = 'http://www.politika.rs/api/v1/getComments/{}?page={}&parent_id={}&ids={}'.format(
                 foreign_id, page, parent_id, ",".join(sub_comment_ids))
-            sub_comments_response = requests.get(sub_comments_url).content.decode('utf-8-sig')
+            sub_comments_response = self._client.get(sub_comments_url).content.decode('utf-8-sig')
             try:
                 sub_comments_json = json.loads(sub_comments_response)
             except json.JSONDecodeError:
                 break
             if 'data' not in sub_comments_response or len(sub_comments_json['data']) == 0:
                 break
-            sub_comments_counter = len(sub_comment_ids) + 1
             for sub_comment in sub_comments_json['data']:
-                sub_text = sub_comment['Comment']['text']
-                sub_id = "%s-%d" % (parent_local_id, sub_comments_counter)
-                comments.append(Comment(sub_id, parent_local_id, sub_text))
-                sub_comments_counter += 1
+                sub_texts.append(sub_comment['Comment']['text'])
 
             page += 1
 
-        return comments
+        return sub_texts
 
-    def format_text(self, text):
+    def _clean(self, text):
         """
-        Format XML text.
-        :param text:
+        Remove images and their captions.
+        :param text: BeautifulSoup article tag
         :return:
         """
-        for tag in text.findAll('div', class_='caption-title'):
-            tag.decompose()
-        for tag in text.findAll('div', class_='article-content mt3 mb3'):
-            tag.decompose()
-
-        for tag in text.findAll():
-            if tag.name == 'img':
-                if tag.next.next.name == 'i':
-                    tag.next.next.decompose()
-                    tag.next.decompose()
-                    tag.decompose()
-
-                if tag.next.next.next.name == 'i':
-                    tag.next.next.next.decompose()
-                    tag.next.next.decompose()
-
-                if tag.next.next.next.name == 'em':
-                    tag.next.next.next.decompose()
-                    tag.next.next.decompose()
-
-                if tag.next.next.next.next.name == 'i':
-                    tag.next.next.next.next.decompose()
-                    tag.next.next.next.decompose()
-        cleared = super().format_text(text)
-
-        # for skip_tag in constants.skip_tags:
-        #     for tag in text.findAll(skip_tag):
-        #         tag.decompose()
-        # cleared = text.text
-        # cleared = cleared.replace('&quot;', '"')
-        # cleared = cleared.replace('&amp;', '&')
-        # cleared = cleared.strip()  # .replace("\n", " ")
-        return cleared
+        for tag in text.findAll('img'):
+            if tag.next.next.name == 'i':
+                tag.next.next.decompose()
+                tag.next.decompose()
+                tag.decompose()
+
+            if tag.next.next.next.name == 'i':
+                tag.next.next.next.decompose()
+                tag.next.next.decompose()
+
+            if tag.next.next.next.name == 'em':
+                tag.next.next.next.decompose()
+                tag.next.next.decompose()
+
+            if tag.next.next.next.next.name == 'i':
+                tag.next.next.next.next.decompose()
+                tag.next.next.next.decompose()
@@ -1,12 +1,11 @@
 import logging
 from datetime import datetime
 
-import requests
-from bs4 import BeautifulSoup
-
 import constants
+from cleanup import Rule
 from model import ShortArticle, Article
-from scraper import Scraper
+from retry import PermanentError
+from scraper import Scraper, strainer
 
 logging.basicConfig(level=logging.INFO,
                     format='%(asctime)s - %(levelname)s - %(message)s',
@@ -18,6 +17,17 @@ class ScraperNovice(Scraper):
     """
     Scraper class for Slovenske novice news
     """
+    # Elements needed from search result pages. Articles are located through parents of date divs, so the list
+    # of articles is parsed from the whole page.
+    _pages_strainer = strainer('a', 'Pagination-link last')
+    # Tags removed from article text
+    _cleanup_rules = [
+        Rule('div', class_='ArticleImage-description'),
+        Rule('span', text=['Potrebujete Javascript']),
+        Rule('span', class_='itemImageDesc'),
+        Rule('ul'),
+        Rule('ol'),
+    ]
 
     def __init__(self):
         site_name = 'Slovenske_novice'
@@ -28,23 +38,11 @@ class ScraperNovice(Scraper):
         Return list of articles (ListArticle objects) within defined range.
         :return:
         """
-        for keyword in constants.keywords:
-            logging.info("Keyword: %s" % keyword)
-            for year in range(constants.MIN_DATE.year, constants.MAX_DATE.year):
-                logging.info("Year: %s" % year)
-                number_of_pages = self._get_keyword_number_of_pages(keyword, year=year)
-                logging.info("Number of pages: %s" % number_of_pages)
-                for page_num in range(1, number_of_pages + 1):
-                    logging.info("%d" % page_num)
-                    articles_list, stop_iteration = self._get_articles_list(keyword, page_num, year=year)
-                    self._articles.extend(articles_list)
-                    # Stop iteration if article is older than min date
-                    if stop_iteration:
-                        break
+        self._articles.extend(self._search_windows(self._planner.queries(constants.keywords)))
 
     def _get_keyword_number_of_pages(self, keyword, **kwargs):
-        response = requests.get(self._generic_url.format(keyword, kwargs['year'], 1))
-        soup = BeautifulSoup(response.content, 'html.parser')
+        response = self._client.get(self._generic_url.format(keyword, kwargs['window'][0].year, 1))
+        soup = self._parse_html(response.content, self._pages_strainer)
         try:
             pages = soup.find("a", class_="Pagination-link last")['data-page']
         except TypeError:
@@ -52,10 +50,10 @@ class ScraperNovice(Scraper):
         return int(pages)
 
     def _get_articles_list(self, keyword, page_num, **kwargs):
-        url = self._generic_url.format(keyword, kwargs['year'], page_num)
+        url = self._generic_url.format(keyword, kwargs['window'][0].year, page_num)
 
-        response = requests.get(url)
-        soup = BeautifulSoup(response.content, 'html.parser')
+        response = self._client.get(url)
+        soup = self._parse_html(response.content)
         articles = []
 
         article_titles = soup.find_all('h2')
@@ -67,6 +65,9 @@ class ScraperNovice(Scraper):
             article_href = date_div.parent.find('a')['href']
             article_url = "https://www.slovenskenovice.si%s" % article_href if 'http' not in article_href else article_href
             date = datetime.strptime(date_div.text.split('Objavljeno ')[-1].strip(), '%d.%m.%Y %H:%M')
+            # Search returns the whole year, window may be clipped to the date range
+            if not kwargs['window'][0] <= date < kwargs['window'][1]:
+                continue
 
             articles.append(
                 ShortArticle(keyword=keyword, url=article_url.strip(), title=article_title.strip(),
@@ -75,8 +76,8 @@ class ScraperNovice(Scraper):
 
     def _get_full_article(self, short_article):
         url = short_article.url
-        response = requests.get(url)
-        soup = BeautifulSoup(response.content, 'html.parser')
+        response = self._client.get(url)
+        soup = self._parse_html(response.content)
         try:
             text = self.get_formatted_article(text=soup.find('div', class_='itemFullText'),
                                               lead=soup.find('h2', class_='itemSubtitle'))
@@ -98,26 +99,5 @@ class ScraperNovice(Scraper):
                 logging.info('Total comments: %d' % len(comments))
             full_article = Article(short_article, text, author, comments)
             return full_article
-        except AttributeError:
-            logging.error("Invalid URL: %s" % url)
-        return None
-
-    def format_text(self, text):
-        """
-        Format XML text.
-        :param text:
-        :return:
-        """
-        for tag in text.findAll('div', class_='ArticleImage-description'):
-            tag.decompose()
-        for tag in text.findAll('span'):
-            if 'Potrebujete Javascript' in tag.text:
-                tag.decompose()
-        for tag in text.findAll('span', class_='itemImageDesc'):
-            tag.decompose()
-        for tag in text.findAll('ul'):
-            tag.decompose()
-        for tag in text.findAll('ol'):
-            tag.decompose()
-        cleared = super().format_text(text)
-        return cleared
+        except AttributeError as e:
+            raise PermanentError("Invalid article page: %s" % url) from e
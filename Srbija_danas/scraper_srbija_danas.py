@@ -8,12 +8,10 @@ import shutil
 from builtins import staticmethod
 from datetime import datetime
 
-import requests
-from bs4 import BeautifulSoup
-
-import constants
-from model import ShortArticle, Article, Comment
-from scraper import Scraper
+from cleanup import Rule
+from model import ShortArticle, Article, CommentTree
+from retry import PermanentError
+from scraper import Scraper, strainer
 
 logging.basicConfig(level=logging.INFO,
                     format='%(asctime)s - %(levelname)s - %(message)s',
@@ -25,6 +23,28 @@ class ScraperSrbijaDanas(Scraper):
     """
     Scraper class for Srbija Danas news.
     """
+    # Elements needed from search result and comment pages
+    _pages_strainer = strainer('li', 'pager-item')
+    _articles_strainer = strainer('article', 'o-media')
+    _comments_strainer = strainer('p', 'article-content__body')
+    # Tags removed from article text
+    _cleanup_rules = [
+        Rule('div', class_='article__tags-wrapper'),
+        Rule('h2', class_='pane-title'),
+        Rule('h2', class_='o-media__title'),
+        Rule('h2', text=['(video)', '(foto)'], ignore_case=True),
+        Rule('div', class_='field-type-text'),
+        Rule('div', class_='o-media-container__body'),
+        Rule('div', class_='read-latest'),
+        Rule('div', class_='in-article-reference'),
+        Rule('div', class_='poll'),
+        Rule('div', class_='social-media-embed'),
+        Rule('li', class_='read-also__item'),
+        Rule('blockquote'),
+        Rule('div', class_='highlighted'),
+        Rule(['b', 'strong', 'a'], text=['(video)', '(foto)', 'bonus video', 'bonus galerija', 'pročitajte i'],
+             ignore_case=True),
+    ]
 
     def __init__(self):
         site_name = 'Srbija_danas'
@@ -43,8 +63,8 @@ class ScraperSrbijaDanas(Scraper):
                 ShortArticle(e[1], e[0], "%s *****" % (e[0].split('/')[-1]), "None", self._site_name))
 
     def _get_keyword_number_of_pages(self, keyword, **kwargs):
-        response = requests.get(self._generic_url.format(keyword, 1))
-        soup = BeautifulSoup(response.content, 'html.parser')
+        response = self._client.get(self._generic_url.format(keyword, 1))
+        soup = self._parse_html(response.content, self._pages_strainer)
         try:
             pages = soup.find_all("li", class_="pager-item")[-1].text.split(" ")[-1]
         except (TypeError, IndexError):
@@ -53,17 +73,17 @@ class ScraperSrbijaDanas(Scraper):
 
     def _get_articles_list(self, keyword, page_num, **kwargs):
         url = self._generic_url.format(keyword, page_num)
-        response = requests.get(url)
-        article_divs = BeautifulSoup(response.content, 'html.parser').find_all('article', class_='o-media')
+        response = self._client.get(url)
+        article_divs = self._parse_html(response.content, self._articles_strainer).find_all('article', class_='o-media')
         articles = []
         for article_div in article_divs:
             article_url = "https://www.srbijadanas.com%s" % article_div.find('a', class_='o-media__link')['href']
             date = article_div.find('time', class_='o-media__date')['datetime']
             date = datetime.utcfromtimestamp(int(date))
 
-            if date >= constants.MAX_DATE:
+            if date >= self._max_date:
                 continue
-            if date < constants.MIN_DATE:
+            if date < self._min_date:
                 return articles, True
 
             article_title = article_div.find('h2').text.strip()
@@ -74,13 +94,8 @@ class ScraperSrbijaDanas(Scraper):
 
     def _get_full_article(self, short_article):
         url = short_article.url
-        try:
-            response = requests.get(url)
-        except requests.exceptions.ConnectionError:
-            logging.error("Invalid URL: %s" % url)
-            return None
-
-        soup = BeautifulSoup(response.content, 'html.parser')
+        response = self._client.get(url)
+        soup = self._parse_html(response.content)
         try:
             author = soup.find('span', {'class': 'article__author'})
             if author is None or "Foto" in author:
@@ -108,68 +123,18 @@ class ScraperSrbijaDanas(Scraper):
 
             full_article = Article(short_article, text, author, comments)
             return full_article
-        except (AttributeError, TypeError):
-            logging.error("Invalid URL: %s" % url)
-        return None
+        except (AttributeError, TypeError) as e:
+            raise PermanentError("Invalid article page: %s" % url) from e
 
     def _get_comments(self, id):
-        comment_counter = 0
-        comments = []
+        comment_tree = CommentTree()
         url = self._comments_url.format(id)
-        response = requests.get(url)
-        comment_divs = BeautifulSoup(response.content, 'html.parser').find_all('p', class_='article-content__body')
+        response = self._client.get(url)
+        soup = self._parse_html(response.content, self._comments_strainer)
+        comment_divs = soup.find_all('p', class_='article-content__body')
         for comment_div in comment_divs:
-            comment_text = comment_div.text
-            comment_counter += 1
-            comments.append(Comment("%s" % comment_counter, '', comment_text))
-        return comments
-
-    def format_text(self, text):
-        """
-        Format XML text.
-        :param text:
-        :return:
-        """
-        for tag in text.findAll('div', class_='article__tags-wrapper'):
-            tag.decompose()
-        for tag in text.findAll('h2', class_='pane-title'):
-            tag.decompose()
-        for tag in text.findAll('h2', class_='o-media__title'):
-            tag.decompose()
-        for tag in text.findAll('h2'):
-            text = tag.text.lower()
-            if "(video)" in text or "(foto)" in text:
-                tag.decompose()
-        for tag in text.findAll('div', class_='field-type-text'):
-            tag.decompose()
-        for tag in text.findAll('div', class_='o-media-container__body'):
-            tag.decompose()
-        for tag in text.findAll('div', class_='read-latest'):
-            tag.decompose()
-        for tag in text.findAll('div', class_='in-article-reference'):
-            tag.decompose()
-        for tag in text.findAll('div', class_='poll'):
-            tag.decompose()
-        for tag in text.findAll('div', {'class': 'social-media-embed'}):
-            tag.decompose()
-        for tag in text.findAll('li', {'class': 'read-also__item'}):
-            tag.decompose()
-        for tag in text.findAll('blockquote'):
-            tag.decompose()
-        for tag in text.findAll('div', class_='highlighted'):
-            tag.decompose()
-
-        bold_strong = text.findAll('b')
-        bold_strong.extend(text.findAll('strong'))
-        bold_strong.extend(text.findAll('a'))
-        for tag in bold_strong:
-            tag_text = tag.text.lower()
-            if "(video)" in tag_text or '(foto)' in tag_text or 'bonus video' in tag_text or 'bonus galerija' in \
-                    tag_text or 'pročitajte i' in tag_text:
-                tag.decompose()
-
-        cleared = super().format_text(text)
-        return cleared
+            comment_tree.add(comment_div.text)
+        return comment_tree.comments
 
     @staticmethod
     def remove_thrash_articles():
@@ -1,12 +1,10 @@
 import logging
 from datetime import datetime
 
-import requests
-from bs4 import BeautifulSoup
-
-import constants
+from cleanup import Rule
 from model import ShortArticle, Article
-from scraper import Scraper
+from retry import PermanentError
+from scraper import Scraper, strainer
 
 logging.basicConfig(level=logging.INFO,
                     format='%(asctime)s - %(levelname)s - %(message)s',
@@ -18,14 +16,22 @@ class ScraperSvet24(Scraper):
     """
     Scraper class for Svet24 news
     """
+    # Elements needed from search result pages
+    _pages_strainer = strainer('div', 'flex items-center justify-center')
+    _articles_strainer = strainer(['div', 'a'], 'sub-article-info', 'sub-article group img-lin-grad')
+    # Tags removed from article text
+    _cleanup_rules = [
+        Rule('div', class_='article-img-desc'),
+        Rule('div', class_='author'),
+    ]
 
     def __init__(self):
         site_name = 'Svet24'
         super().__init__(site_name)
 
     def _get_keyword_number_of_pages(self, keyword, **kwargs):
-        response = requests.get(self._generic_url.format(keyword, 1))
-        soup = BeautifulSoup(response.content, 'html.parser')
+        response = self._client.get(self._generic_url.format(keyword, 1))
+        soup = self._parse_html(response.content, self._pages_strainer)
         try:
             pages = soup.find("div", class_="flex items-center justify-center").find_all("a")[-2].text
         except AttributeError:
@@ -34,8 +40,8 @@ class ScraperSvet24(Scraper):
 
     def _get_articles_list(self, keyword: str, page_num: int, **kwargs):
         url = self._generic_url.format(keyword, page_num)
-        response = requests.get(url)
-        soup = BeautifulSoup(response.content, 'html.parser')
+        response = self._client.get(url)
+        soup = self._parse_html(response.content, self._articles_strainer)
         articles = []
 
         date_divs = soup.find_all('div', class_="sub-article-info")
@@ -52,7 +58,7 @@ class ScraperSvet24(Scraper):
             article_title = url_title_div.find('h4').text.strip()
 
             date = datetime.strptime(article_date, '%d. %b %Y, %H:%M')
-            if date >= constants.MAX_DATE or date < constants.MIN_DATE:
+            if date >= self._max_date or date < self._min_date:
                 continue
 
             articles.append(
@@ -62,8 +68,8 @@ class ScraperSvet24(Scraper):
 
     def _get_full_article(self, short_article: ShortArticle):
         url = short_article.url
-        response = requests.get(url)
-        soup = BeautifulSoup(response.content, 'html.parser')
+        response = self._client.get(url)
+        soup = self._parse_html(response.content)
 
         try:
             text = self.get_formatted_article(
@@ -82,19 +88,5 @@ class ScraperSvet24(Scraper):
 
             full_article = Article(short_article, text, author, comments)
             return full_article
-        except AttributeError:
-            logging.error("Invalid URL: %s" % url)
-        return None
-
-    def format_text(self, text):
-        """
-        Format XML text.
-        :param text:
-        :return:
-        """
-        for tag in text.findAll('div', class_='article-img-desc'):
-            tag.decompose()
-        for tag in text.findAll('div', class_='author'):
-            tag.decompose()
-        cleared = super().format_text(text)
-        return cleared
+        except AttributeError as e:
+            raise PermanentError("Invalid article page: %s" % url) from e
@@ -0,0 +1,91 @@
+"""
+Benchmark of removing duplicates, sorting and building IDs of a synthetic list of 500k found articles, against the
+previous implementation (set, comparison of articles and list.index), which is measured on smaller lists because it
+is quadratic. Run from root of the project: python benchmarks/build_ids.py
+"""
+
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model import ShortArticle  # noqa: E402
+from scraper import Scraper  # noqa: E402
+from transliteration import _to_latin_cached  # noqa: E402
+
+SITE_NAME = 'Politika'
+WORDS = ['корона', 'вирус', 'вакцина', 'Србија', 'пандемија', 'мере', 'ковид', 'болница', 'Београд', 'епидемија',
+         'korona', 'virus', 'vakcina', 'Srbija', 'pandemija', 'mere', 'kovid', 'bolnica', 'Beograd', 'epidemija']
+
+
+def generate_articles(size, unique_ratio=0.57, seed=0):
+    """
+    Generate list of found articles, in which some articles are found more than once (by several keywords).
+    :param size: number of articles in the list
+    :param unique_ratio: ratio of distinct URLs
+    :param seed: seed of random generator
+    :return: list of ShortArticle objects
+    """
+    rng = random.Random(seed)
+    distinct = max(1, int(size * unique_ratio))
+    titles = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 10))) for _ in range(distinct)]
+    articles = []
+    for _ in range(size):
+        number = rng.randrange(distinct)
+        articles.append(ShortArticle(keyword=rng.choice(WORDS), url='https://www.politika.rs/sr/clanak/%d' % number,
+                                     title=titles[number], time='2020-03-01', site_name=SITE_NAME))
+    return articles
+
+
+def run_current(articles):
+    """
+    Remove duplicates, sort and build IDs with Scraper methods.
+    :param articles: list of ShortArticle objects
+    :return: seconds
+    """
+    scraper = Scraper(SITE_NAME)
+    scraper._articles = list(articles)
+    _to_latin_cached.cache_clear()
+    start = time.perf_counter()
+    scraper._remove_duplicates()
+    scraper._sort()
+    scraper._build_ids()
+    return time.perf_counter() - start
+
+
+def run_previous(articles, site_id):
+    """
+    Remove duplicates, sort and build IDs as the previous implementation did.
+    :param articles: list of ShortArticle objects
+    :param site_id: id of the site
+    :return: seconds
+    """
+    _to_latin_cached.cache_clear()
+    start = time.perf_counter()
+    articles = list(set(articles))
+    articles = sorted(articles)
+    for article in articles:
+        article.id = "{}-{}".format(site_id, articles.index(article) + 1)
+    return time.perf_counter() - start
+
+
+def main():
+    logging.disable(logging.INFO)
+    site_id = Scraper(SITE_NAME)._site_id
+    for size in (5000, 10000, 20000):
+        articles = generate_articles(size)
+        previous_time = run_previous(articles, site_id)
+        current_time = run_current(articles)
+        print("%d articles: previous %.3f s, current %.3f s, %.0fx faster" % (
+            size, previous_time, current_time, previous_time / current_time))
+    articles = generate_articles(500000)
+    current_time = run_current(articles)
+    print("500000 articles (%d unique): current %.3f s; previous grows quadratically, about %.0f s extrapolated" % (
+        len({article.url for article in articles}), current_time, previous_time * (500000 / 20000) ** 2))
+
+
+if __name__ == '__main__':
+    main()
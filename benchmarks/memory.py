@@ -0,0 +1,126 @@
+"""
+Benchmark of memory taken by comments, found articles and scraped articles, against the previous model classes, which
+kept attributes in instance dictionaries and stored transliterated texts. Run from root of the project:
+python benchmarks/memory.py
+"""
+
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from constants import site_ids  # noqa: E402
+from model import Comment, ShortArticle, Article  # noqa: E402
+from transliteration import to_latin, _to_latin_cached  # noqa: E402
+
+SITE_NAME = 'Politika'
+WORDS = ['корона', 'вирус', 'вакцина', 'Србија', 'пандемија', 'мере', 'ковид', 'болница', 'Београд',
+         'епидемија', 'korona', 'virus', 'vakcina', 'Srbija', 'pandemija', 'mere', 'kovid', 'bolnica']
+
+
+class PreviousComment:
+    """
+    Comment as it was kept before __slots__.
+    """
+
+    def __init__(self, comment_id, parent_comment_id, text):
+        self.id = comment_id
+        self.parent_id = parent_comment_id
+        self.text = Comment._format_comment(self, text)
+        self.text_transliterated = to_latin(self.text)
+
+
+class PreviousShortArticle:
+    """
+    Found article as it was kept before __slots__.
+    """
+
+    def __init__(self, keyword, url, title, time, site_name, article_id=None):
+        self._keyword = keyword
+        self._url = url
+        self._title = title
+        self._time = time
+        self._title_transliterated = to_latin(self._title)
+        self._site_name = site_name
+        self._site_id = site_ids[site_name]
+        self._article_id = article_id
+
+
+class PreviousArticle(PreviousShortArticle):
+    """
+    Scraped article as it was kept before __slots__.
+    """
+
+    def __init__(self, short_article, text, author, comments):
+        super().__init__(short_article._keyword, short_article._url, short_article._title, short_article._time,
+                         short_article._site_name, short_article._article_id)
+        self.document_name = "%s.xml" % short_article._article_id
+        self.source_id = short_article._site_id
+        self.source_name = short_article._site_name
+        self.local_id = short_article._article_id.split("%s-" % short_article._site_id)[-1]
+        self.title_transliterated = short_article._title_transliterated
+        self.text = text
+        self.author = to_latin(author.strip())
+        self.text_transliterated = to_latin(self.text)
+        self.comments = comments
+
+
+def generate_texts(size, words, seed=0):
+    """
+    Generate random texts.
+    :param size: number of texts
+    :param words: number of words in each text
+    :param seed: seed of random generator
+    :return: list of texts
+    """
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(words)) for _ in range(size)]
+
+
+def measure(create, size):
+    """
+    Returns memory allocated per record by creating records, including strings created for them. Input strings are
+    created before the measurement.
+    :param create: function that creates record with given index
+    :param size: number of records
+    :return: bytes per record
+    """
+    _to_latin_cached.cache_clear()
+    tracemalloc.start()
+    records = [create(i) for i in range(size)]
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del records
+    return allocated / size
+
+
+def main():
+    size = 20000
+    comment_texts = generate_texts(size, 20)
+    titles = generate_texts(size, 8, seed=1)
+    urls = ['https://www.politika.rs/sr/clanak/%d' % i for i in range(size)]
+    ids = ['%s-%d' % (site_ids[SITE_NAME], i + 1) for i in range(size)]
+    short_articles = [ShortArticle('корона', urls[i], titles[i], '2020-03-01', SITE_NAME, ids[i]) for i in range(size)]
+    previous_short_articles = [PreviousShortArticle('корона', urls[i], titles[i], '2020-03-01', SITE_NAME, ids[i])
+                               for i in range(size)]
+    # Articles share one text, so only the record and its own strings (e.g. transliterated text) are counted
+    text = generate_texts(1, 100)[0]
+    records = [
+        ('Comment', lambda i: PreviousComment(i, None, comment_texts[i]), lambda i: Comment(i, None, comment_texts[i])),
+        ('ShortArticle',
+         lambda i: PreviousShortArticle('корона', urls[i], titles[i], '2020-03-01', SITE_NAME, ids[i]),
+         lambda i: ShortArticle('корона', urls[i], titles[i], '2020-03-01', SITE_NAME, ids[i])),
+        ('Article', lambda i: PreviousArticle(previous_short_articles[i], text, 'Autor', []),
+         lambda i: Article(short_articles[i], text, 'Autor', [])),
+    ]
+    for name, create_previous, create_current in records:
+        previous_bytes = measure(create_previous, size)
+        current_bytes = measure(create_current, size)
+        print("%s: previous %.0f B, current %.0f B per record, %.0f%% less" % (
+            name, previous_bytes, current_bytes, 100 * (1 - current_bytes / previous_bytes)))
+
+
+if __name__ == '__main__':
+    main()
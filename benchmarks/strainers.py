@@ -0,0 +1,102 @@
+"""
+Benchmark of parsing search result pages of each site with and without the site's SoupStrainer, on synthetic pages with
+20 results between navigation and scripts. Both runs must return the same articles. Run from root of the project:
+python benchmarks/strainers.py
+"""
+
+import importlib
+import logging
+import os
+import sys
+import timeit
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import scrapers  # noqa: E402
+
+RESULTS = 20
+# Result item of each site, formatted with its number
+ITEMS = {
+    'Politika': '<div class="arial light-gray inline-block uppercase border-left px1 ml1">'
+                '<span class="item-date">01.02.2018</span><span class="item-time">u 10:00</span></div>'
+                '<div class="clearfix h4 bold roboto-slab mt1"><a href="/sr/clanak/{0}">Naslov {0}</a></div>',
+    'Kurir': '<div class="itemContent extra"><a class="itemLnk" href="/vesti/{0}">x</a><div class="time">01-02-2018'
+             '</div><h2>Naslov {0} <span>foto</span></h2></div>',
+    'Srbija_danas': '<article class="o-media o-media--x"><a class="o-media__link" href="/vesti/{0}">x</a>'
+                    '<time class="o-media__date" datetime="1517479200"></time><h2>Naslov {0}</h2></article>',
+    'Alo': '<div class="categoryList__details"><ul><li>pre 3000d</li><li><a href="/vesti/{0}">x</a></li></ul>'
+           '<h2><span>Naslov {0}</span></h2></div>',
+    'Delo': '<div class="itemTitle"><a href="/novice/{0}"><h2>Naslov {0}</h2></a></div>'
+            '<div class="itemDatePublished">Objavljeno 01.02.2018 10:00</div>',
+    'Svet24': '<div class="sub-article-info">Novice\n01. Feb 2018, 10:00</div>'
+              '<a class="sub-article group img-lin-grad" href="/novice/{0}"><h4>Naslov {0}</h4></a>',
+}
+NOISE = ''.join('<div class="nav"><ul>%s</ul></div><script>var x = %d;</script>' % (
+    ''.join('<li><a href="/rubrika/%d">Rubrika %d</a></li>' % (i, i) for i in range(50)), j) for j in range(40))
+
+
+class Response:
+    """
+    Response with given content.
+    """
+
+    def __init__(self, content):
+        self.content = content
+        self.status_code = 200
+
+
+class Client:
+    """
+    Client that returns the same page for every URL.
+    """
+
+    def __init__(self, content):
+        self._content = content
+
+    def get(self, url, **kwargs):
+        return Response(self._content)
+
+
+def create_page(site_name):
+    """
+    Create search result page of the site.
+    :param site_name: name of the site
+    :return: page as bytes
+    """
+    items = ''.join(ITEMS[site_name].format(i) for i in range(RESULTS))
+    return ('<html><head><title>Pretraga</title></head><body>%s%s%s</body></html>' % (NOISE, items, NOISE)).encode()
+
+
+def measure(scraper, strainer, number=5):
+    """
+    Returns articles read from the page and best time of reading it.
+    :param scraper: scraper whose client returns the page
+    :param strainer: SoupStrainer set as articles strainer of the scraper, or None to parse the whole page
+    :param number: number of pages read in each run
+    :return: list of (url, title, time) of the articles, seconds per page
+    """
+    scraper._articles_strainer = strainer
+    window = (datetime(2018, 1, 1), datetime(2019, 1, 1))
+
+    def run():
+        return scraper._get_articles_list('korona', 1, window=window)[0]
+    articles = [(article.url, article.title, article.time) for article in run()]
+    return articles, min(timeit.repeat(run, number=number, repeat=3)) / number
+
+
+def main():
+    logging.disable(logging.INFO)
+    for site_name in ITEMS:
+        module_name, class_name = scrapers[site_name]
+        scraper = getattr(importlib.import_module(module_name), class_name)()
+        scraper._client = Client(create_page(site_name))
+        strained_articles, strained_time = measure(scraper, type(scraper)._articles_strainer)
+        full_articles, full_time = measure(scraper, None)
+        assert strained_articles == full_articles and len(full_articles) == RESULTS, site_name
+        print("%s: whole page %.1f ms, strained %.1f ms, %.1fx faster" % (
+            site_name, full_time * 1000, strained_time * 1000, full_time / strained_time))
+
+
+if __name__ == '__main__':
+    main()
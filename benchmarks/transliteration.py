@@ -0,0 +1,60 @@
+"""
+Benchmark of transliteration.to_latin against translit(text, 'sr', reversed=True) of transliterate package, over
+titles of all committed article lists. Run from root of the project: python benchmarks/transliteration.py
+"""
+
+import glob
+import os
+import pickle
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transliterate import translit  # noqa: E402
+
+from transliteration import to_latin, _to_latin_cached  # noqa: E402
+
+
+def load_titles(site_names=None):
+    """
+    Load titles of articles from article lists.
+    :param site_names: names of sites, all sites if None
+    :return: list of titles
+    """
+    titles = []
+    for file_path in sorted(glob.glob('*/data/news_list')):
+        if site_names is None or file_path.split(os.sep)[0] in site_names:
+            with open(file_path, 'rb') as f:
+                titles.extend(article.title for article in pickle.load(f))
+    return titles
+
+
+def measure(function, texts, repeat=5):
+    """
+    Returns best time of transliterating all texts, with empty cache before each run.
+    :param function: transliteration function
+    :param texts: list of texts
+    :param repeat: number of runs
+    :return: seconds
+    """
+    def run():
+        _to_latin_cached.cache_clear()
+        for text in texts:
+            function(text)
+    return min(timeit.repeat(run, number=1, repeat=repeat))
+
+
+def main():
+    corpora = [('Serbian titles', load_titles(['Politika', 'Kurir', 'Alo', 'Srbija_danas'])),
+               ('Slovenian titles', load_titles(['Delo', 'Slovenske_novice', 'Dnevnik', 'Večer', 'Svet24', 'ur24'])),
+               ('Long texts', [" ".join(load_titles(['Politika'])[i:i + 200]) for i in range(0, 3800, 200)])]
+    for name, texts in corpora:
+        translit_time = measure(lambda text: translit(text, 'sr', reversed=True), texts)
+        to_latin_time = measure(to_latin, texts)
+        print("%s (%d): transliterate %.3f s, to_latin %.3f s, %.1fx faster" % (
+            name, len(texts), translit_time, to_latin_time, translit_time / to_latin_time))
+
+
+if __name__ == '__main__':
+    main()
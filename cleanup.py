@@ -0,0 +1,148 @@
+"""
+Declarative removal of unwanted tags from article text.
+"""
+
+from bs4 import Tag
+
+
+class Rule:
+    """
+    Rule that matches tags which should be removed from article text.
+    """
+
+    def __init__(self, name=None, class_=None, attrs=None, text=None, ignore_case=False):
+        """
+        Constructor. Tag matches the rule if it matches all given conditions.
+        :param name: tag name or list of tag names, any tag if None
+        :param class_: class of the tag, matched like class_ argument of find_all: one of the classes of the tag, or
+        the whole class attribute, equals it
+        :param attrs: dictionary of other attributes and their values
+        :param text: list of strings, at least one of them must be contained in the text of the tag
+        :param ignore_case: compare text of the tag in lower case
+        """
+        self.name = name
+        self.class_ = class_
+        self.attrs = attrs or {}
+        self.text = text
+        self.ignore_case = ignore_case
+
+    def matches(self, tag, get_text=None):
+        """
+        Check if tag matches the rule.
+        :param tag: BeautifulSoup tag
+        :param get_text: function that returns text of the tag, checked against text of the rule, whole text of the
+        tag if None
+        :return: True if tag matches
+        """
+        if self.class_ is not None:
+            classes = tag.get('class')
+            if classes is None:
+                return False
+            if isinstance(classes, str):
+                classes = classes.split()
+            if self.class_ not in classes and self.class_ != " ".join(classes):
+                return False
+        for attr, value in self.attrs.items():
+            if tag.get(attr) != value:
+                return False
+        if self.text is not None:
+            tag_text = tag.text if get_text is None else get_text()
+            if self.ignore_case:
+                tag_text = tag_text.lower()
+            if not any(t in tag_text for t in self.text):
+                return False
+        return True
+
+
+class Cleaner:
+    """
+    Removes all tags that match any of the rules in a single traversal of the tree. The result is the same as if
+    each rule removed its tags from the whole tree in turn, in the order of the rules, and of names of a rule: text
+    of a tag is checked without its descendants that an earlier rule removes.
+    """
+
+    def __init__(self, rules):
+        """
+        Constructor.
+        :param rules: list of Rule objects
+        """
+        # Rules are ordered by (position of the rule, position of the name in the rule)
+        self._rules_by_name = {}
+        self._any_name_rules = []
+        for position, rule in enumerate(rules):
+            if rule.name is None:
+                self._any_name_rules.append(((position, 0), rule))
+            else:
+                for name_position, name in enumerate([rule.name] if isinstance(rule.name, str) else rule.name):
+                    self._rules_by_name.setdefault(name, []).append(((position, name_position), rule))
+        # Rules that may match a tag name, in order
+        self._candidates = {}
+
+    def __bool__(self):
+        return bool(self._rules_by_name or self._any_name_rules)
+
+    def clean(self, root):
+        """
+        Remove all descendants of the root that match any of the rules. Children are visited before their parent,
+        so when text of a tag is checked, it is known which of its descendants earlier rules remove. Tags are removed
+        after the traversal.
+        :param root: BeautifulSoup tag
+        :return:
+        """
+        if not self:
+            return
+        # id of tag: order of the first rule that removes it
+        removed_by = {}
+        # Tags to remove, without descendants of other tags to remove
+        removed = []
+        # Tag and, once its children are on the stack, number of tags to remove found before its descendants
+        stack = [(child, None) for child in reversed(root.contents) if isinstance(child, Tag)]
+        while stack:
+            tag, removed_before = stack.pop()
+            if removed_before is None:
+                stack.append((tag, len(removed)))
+                stack.extend((child, None) for child in reversed(tag.contents) if isinstance(child, Tag))
+                continue
+            order = self._match(tag, removed_by)
+            if order is not None:
+                removed_by[id(tag)] = order
+                del removed[removed_before:]
+                removed.append(tag)
+        for tag in removed:
+            tag.decompose()
+
+    def _match(self, tag, removed_by):
+        """
+        Returns order of the first rule that matches the tag.
+        :param tag: BeautifulSoup tag
+        :param removed_by: orders of rules that remove descendants of the tag
+        :return: order of the rule, None if no rule matches
+        """
+        candidates = self._candidates.get(tag.name)
+        if candidates is None:
+            candidates = sorted(self._rules_by_name.get(tag.name, []) + self._any_name_rules, key=lambda c: c[0])
+            self._candidates[tag.name] = candidates
+        for order, rule in candidates:
+            if rule.matches(tag, lambda: self._text_before(tag, order, removed_by)):
+                return order
+        return None
+
+    @staticmethod
+    def _text_before(tag, order, removed_by):
+        """
+        Returns text of the tag without descendants removed by rules before the given order.
+        :param tag: BeautifulSoup tag
+        :param order: order of the rule
+        :param removed_by: orders of rules that remove descendants of the tag
+        :return: text
+        """
+        if not removed_by:
+            return tag.text
+        strings = []
+        for string in tag.strings:
+            parent = string.parent
+            while parent is not tag and removed_by.get(id(parent), order) >= order:
+                parent = parent.parent
+            if parent is tag:
+                strings.append(string)
+        return "".join(strings)
@@ -13,6 +13,64 @@ keywords_serbian = ['jezik', 'jezika', 'jeziku', 'jezikom', 'jezici', 'jezicima'
 MIN_DATE = datetime.strptime("01.01.2015", '%d.%m.%Y')
 MAX_DATE = datetime.strptime("01.01.2020", '%d.%m.%Y')
 
+# Number of articles scraped concurrently
+MAX_WORKERS = 8
+# Maximum number of articles scraped concurrently from the same host
+MAX_WORKERS_PER_HOST = 4
+# Maximum number of comment requests of a single article sent concurrently
+COMMENT_WORKERS = 4
+
+# Number of hosts for which HTTP connections are kept alive
+HTTP_POOL_CONNECTIONS = 10
+# Maximum number of HTTP connections kept alive for the same host
+HTTP_POOL_MAXSIZE = MAX_WORKERS
+# Default timeout of HTTP request in seconds
+HTTP_TIMEOUT = 30
+# Headers sent with every HTTP request, in addition to the defaults of requests
+HTTP_HEADERS = {}
+# Save every raw response to :newspaper:/data/responses, so articles can be rebuilt with --replay. The store is not
+# limited in size and keeps a second copy of pages that are also in the HTTP cache, so it is enabled only for crawls
+# that will be replayed.
+STORE_RESPONSES = False
+# Maximum size in bytes of the HTTP cache in :newspaper:/data/http_cache, used to revalidate pages on re-crawls with
+# ETag and Last-Modified. Least recently used pages are removed first. 0 disables the cache.
+HTTP_CACHE_SIZE = 2 * 1024 ** 3
+# Politeness limits of requests to a single host: requests started per second at the start and its bounds, number of
+# requests that can be started at once after the host was idle, bounds of the number of requests in flight, response
+# time in seconds above which the host is considered overloaded, and seconds without requests after 429 or 503 without
+# Retry-After header. The number of requests in flight starts at the lower bound, the rate at its starting value. Both
+# grow while the host answers in time, and are halved on 429, 503, failed or slow responses.
+RATE_LIMIT = {
+    'rate': 5,
+    'min_rate': 0.5,
+    'max_rate': 50,
+    'burst': 5,
+    'min_concurrency': 1,
+    'max_concurrency': MAX_WORKERS_PER_HOST * COMMENT_WORKERS,
+    'slow_response': 10,
+    'pause': 30,
+}
+# Maximum number of attempts of a request or an article that failed with a transient error (connection error,
+# timeout, status 429 or 5xx), and bounds in seconds of the random delay before the next attempt, which doubles after
+# each attempt
+RETRY_ATTEMPTS = 4
+RETRY_BASE_DELAY = 2
+RETRY_MAX_DELAY = 60
+# Maximum number of articles of a site waiting to be scraped again, articles that do not fit are dead letters
+RETRY_QUEUE_SIZE = 100
+
+# Number of consecutive search result pages of a query that contain only articles found before, after which paging of
+# the query stops. Remaining pages most likely contain articles found by earlier queries. 0 never stops paging.
+QUERY_STALE_PAGES = 2
+
+# BeautifulSoup parser used for all pages: 'lxml' (C-based, requires lxml package) or 'html.parser'. Articles and
+# search result pages are read the same with both (tests/test_parsers.py). lxml ends a heading before a paragraph
+# inside it, so text of such heading does not include the paragraph.
+HTML_PARSER = 'lxml'
+
+# Query parameters that only track where a visit came from, removed from article URLs
+TRACKING_PARAMETERS = ('utm_source', 'utm_medium', 'utm_campaign', 'utm_term', 'utm_content', 'fbclid', 'gclid')
+
 site_ids = {
     "Politika": "sr-01",
     "Kurir": "sr-03",
@@ -34,7 +92,7 @@ site_urls = {
     "Alo": "https://www.alo.rs/article/browse?context=1&q={}&currentPage={}",
     # keyword, page
     "Srbija_danas": "https://www.srbijadanas.com/search-results/{}?page={}",
-    "Delo": 'https://www.delo.si//iskalnik?q={}&time_range={}&page={}',
+    "Delo": 'https://www.delo.si/iskalnik?q={}&time_range={}&page={}',
     'Slovenske_novice': 'https://www.slovenskenovice.si/iskalnik?q={}&time_range={}&page={}',
     'Dnevnik': 'https://www.dnevnik.si/api/article?q={}&from={}&to={}&include_pr_articles=false&&lang=sl&offset={}'
                '&limit=60',
@@ -65,4 +123,26 @@ site_comments = {
     'ur24': 'https://gql.24ur.si/graphql/'
 }
 
+# Search syntax of sites whose search can combine keywords into one query, by key of site_ids. Keywords are either
+# joined with operator 'or' into queries of at most 'max_length' characters, e.g. {'or': ' OR ', 'max_length': 200},
+# or replaced with their common prefixes of at least 'min_prefix' characters followed by wildcard 'prefix', e.g.
+# {'prefix': '*', 'min_prefix': 5}. Sites that are not listed are searched one keyword at a time.
+site_query_syntax = {}
+
+# Limits of hosts of each site that override RATE_LIMIT
+site_rate_limits = {
+    "Politika": {'rate': 2, 'max_rate': 10, 'burst': 2, 'max_concurrency': MAX_WORKERS_PER_HOST, 'pause': 60},
+    "Kurir": {},
+    "Alo": {},
+    "Srbija_danas": {},
+    "Delo": {},
+    'Slovenske_novice': {},
+    'Dnevnik': {},
+    'Večer': {'rate': 2, 'burst': 2},
+    'Svet24': {},
+    'ur24': {},
+}
+# Limits of Facebook comment plugin and Graph API hosts that override RATE_LIMIT, for all sites
+FACEBOOK_RATE_LIMIT = {'rate': 10, 'burst': 10, 'slow_response': 15, 'pause': 120}
+
 skip_tags = ['style', 'iframe', 'javascript', 'css', 'embed-container', 'figcaption', 'script', 'img', 'figure']
@@ -0,0 +1,162 @@
+"""
+HTTP cache for conditional revalidation of pages on re-crawls.
+"""
+
+import gzip
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from response_store import compress
+
+
+class HttpCache:
+    """
+    On-disk cache of responses that have a validator (ETag or Last-Modified header). Cached validators are sent
+    with the next request of the same page, and when the server answers 304 Not Modified the cached body is used.
+    Each entry is a single compressed file. When total size of the files exceeds the maximum size, least recently
+    used entries are removed. Last use of an entry is kept as modification time of its file, so the order survives
+    between runs.
+    """
+
+    def __init__(self, folder, max_size):
+        """
+        Constructor. Existing entries in the folder are indexed.
+        :param folder: root folder of the cache
+        :param max_size: maximum total size of the cache files in bytes
+        """
+        self._folder = folder
+        self._max_size = max_size
+        self._lock = threading.Lock()
+        self._size = 0
+        # Key: size of the entry file, least recently used first
+        self._entries = OrderedDict()
+        # Number of body bytes that were not downloaded thanks to 304 responses
+        self.saved_bytes = 0
+
+        entries = []
+        if os.path.isdir(folder):
+            for sub_folder in os.scandir(folder):
+                if sub_folder.is_dir():
+                    for entry in os.scandir(sub_folder.path):
+                        if entry.is_file() and not entry.name.startswith('tmp'):
+                            stat = entry.stat()
+                            entries.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, key, size in sorted(entries):
+            self._entries[key] = size
+            self._size += size
+
+    @staticmethod
+    def cacheable(response):
+        """
+        Check if response can be revalidated later.
+        :param response: requests.Response
+        :return: True if response should be cached
+        """
+        return response.status_code == 200 and \
+            ('ETag' in response.headers or 'Last-Modified' in response.headers) and \
+            'no-store' not in response.headers.get('Cache-Control', '')
+
+    def validators(self, key):
+        """
+        Returns conditional request headers for the cached page.
+        :param key: key of the request
+        :return: dictionary with If-None-Match and/or If-Modified-Since header, empty if page is not cached
+        """
+        meta = self._load(key, with_content=False)
+        if meta is None:
+            return {}
+        cached_headers = CaseInsensitiveDict(meta['headers'])
+        headers = {}
+        if cached_headers.get('ETag'):
+            headers['If-None-Match'] = cached_headers['ETag']
+        if cached_headers.get('Last-Modified'):
+            headers['If-Modified-Since'] = cached_headers['Last-Modified']
+        return headers
+
+    def revalidated(self, key):
+        """
+        Returns cached response after server answered 304 Not Modified, and marks the entry as recently used.
+        :param key: key of the request
+        :return: requests.Response, or None if page is not cached any more
+        """
+        loaded = self._load(key, with_content=True)
+        if loaded is None:
+            return None
+        meta, content = loaded
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            self.saved_bytes += len(content)
+        try:
+            os.utime(self._path(key))
+        except FileNotFoundError:
+            pass
+        response = requests.Response()
+        response.url = meta['url']
+        response.status_code = meta['status']
+        response.reason = meta['reason']
+        response.headers = CaseInsensitiveDict(meta['headers'])
+        response.encoding = meta['encoding']
+        response._content = content
+        return response
+
+    def save(self, key, response):
+        """
+        Save response to the cache, and remove least recently used entries if cache is too large.
+        :param key: key of the request
+        :param response: requests.Response
+        :return:
+        """
+        meta = {
+            'url': response.url,
+            'status': response.status_code,
+            'reason': response.reason,
+            'headers': dict(response.headers),
+            'encoding': response.encoding,
+        }
+        data = compress(json.dumps(meta).encode('utf-8') + b'\n' + response.content)
+        path = self._path(key)
+        folder = os.path.dirname(path)
+        os.makedirs(folder, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=folder, delete=False) as f:
+            f.write(data)
+        os.replace(f.name, path)
+
+        evicted = []
+        with self._lock:
+            self._size += len(data) - self._entries.pop(key, 0)
+            self._entries[key] = len(data)
+            while self._size > self._max_size and len(self._entries) > 1:
+                old_key, old_size = self._entries.popitem(last=False)
+                self._size -= old_size
+                evicted.append(old_key)
+        for old_key in evicted:
+            try:
+                os.remove(self._path(old_key))
+            except FileNotFoundError:
+                pass
+
+    def _load(self, key, with_content):
+        """
+        Load cached entry.
+        :param key: key of the request
+        :param with_content: load body as well
+        :return: metadata, or metadata and body if with_content, None if entry does not exist
+        """
+        try:
+            with gzip.open(self._path(key), 'rb') as f:
+                meta = json.loads(f.readline().decode('utf-8'))
+                if not with_content:
+                    return meta
+                return meta, f.read()
+        except (OSError, EOFError, ValueError):
+            return None
+
+    def _path(self, key):
+        return os.path.join(self._folder, key[:2], key)
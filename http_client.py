@@ -0,0 +1,199 @@
+"""
+Shared HTTP client.
+"""
+
+import hashlib
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import constants
+
+# Statuses of responses to requests that may succeed later, raised as HTTPError
+TRANSIENT_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+def request_key(method, url, params=None, data=None, json_body=None):
+    """
+    Returns key of the request. Request is prepared as requests would send it, so the same request always gets the
+    same key.
+    :param method: HTTP method
+    :param url: url
+    :param params: query parameters
+    :param data: request body
+    :param json_body: request body as JSON
+    :return: SHA-256 hex digest of method, final URL and body
+    """
+    prepared = requests.Request(method.upper(), url, params=params, data=data, json=json_body).prepare()
+    body = prepared.body or b''
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    digest = hashlib.sha256()
+    digest.update(("%s %s\n" % (prepared.method, prepared.url)).encode('utf-8'))
+    digest.update(body)
+    return digest.hexdigest()
+
+
+class ResponseNotStored(requests.exceptions.RequestException):
+    """
+    Raised in replay mode when response of the request is not in the store.
+    """
+
+
+class HttpClient:
+    """
+    HTTP client used for all requests of a scraper. Connections are kept alive in a pool for each host, so
+    consecutive requests to the same host reuse the TCP and TLS connection. If response store is given, every
+    response is saved to it, and in replay mode responses are loaded from it without any network call. If HTTP cache
+    is given, GET requests of cached pages are sent with their validators, and on 304 Not Modified the cached body is
+    returned. If rate limiter is given, every request waits for the limiter of its host, and its outcome adapts the
+    limits of the host. Responses with status in TRANSIENT_STATUS_CODES are raised as HTTPError, and are neither
+    stored nor cached.
+    """
+
+    def __init__(self, pool_connections=constants.HTTP_POOL_CONNECTIONS, pool_maxsize=constants.HTTP_POOL_MAXSIZE,
+                 timeout=constants.HTTP_TIMEOUT, headers=None, store=None, replay=False, cache=None,
+                 limiter=None):
+        """
+        Constructor.
+        :param pool_connections: number of hosts for which connection pools are kept
+        :param pool_maxsize: maximum number of connections kept in the pool of a single host
+        :param timeout: default timeout of a request in seconds
+        :param headers: headers sent with every request
+        :param store: ResponseStore where responses are saved, None to keep no responses
+        :param replay: load responses from the store instead of sending requests
+        :param cache: HttpCache used to revalidate pages, None to always download whole pages
+        :param limiter: RateLimiter of requests to each host, None to send requests without limits
+        """
+        if replay and store is None:
+            raise ValueError("Replay mode requires response store.")
+        self._timeout = timeout
+        self._store = store
+        self._replay = replay
+        self._cache = cache
+        self._limiter = limiter
+        self._session = requests.Session()
+        self._session.headers.update(constants.HTTP_HEADERS if headers is None else headers)
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+
+    def get(self, url, **kwargs):
+        """
+        Send GET request.
+        :param url: url
+        :param kwargs: optional arguments that requests takes
+        :return: requests.Response
+        """
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, data=None, **kwargs):
+        """
+        Send POST request.
+        :param url: url
+        :param data: request body
+        :param kwargs: optional arguments that requests takes
+        :return: requests.Response
+        """
+        return self.request('POST', url, data=data, **kwargs)
+
+    def request(self, method, url, **kwargs):
+        """
+        Send request using pooled connections and default timeout, revalidating cached page, and save the response
+        to the store. In replay mode the response is loaded from the store.
+        :param method: HTTP method
+        :param url: url
+        :param kwargs: optional arguments that requests takes
+        :return: requests.Response
+        """
+        kwargs.setdefault('timeout', self._timeout)
+        if self._store is None and self._cache is None:
+            return self._checked(self._send(method, url, **kwargs))
+
+        key = request_key(method, url, params=kwargs.get('params'), data=kwargs.get('data'),
+                          json_body=kwargs.get('json'))
+        if self._replay:
+            response = self._store.load(key)
+            if response is None:
+                raise ResponseNotStored("Response is not stored: %s %s" % (method, url))
+            return response
+        if self._cache is not None and method.upper() == 'GET':
+            response = self._revalidate(key, method, url, **kwargs)
+        else:
+            response = self._checked(self._send(method, url, **kwargs))
+        if self._store is not None:
+            self._store.save(key, response)
+        return response
+
+    def _revalidate(self, key, method, url, **kwargs):
+        """
+        Send request with validators of the cached page. Returns cached response if the page was not modified, and
+        caches the new response otherwise.
+        :param key: key of the request
+        :param method: HTTP method
+        :param url: url
+        :param kwargs: optional arguments that requests takes
+        :return: requests.Response
+        """
+        validators = self._cache.validators(key)
+        if validators:
+            headers = dict(kwargs.get('headers') or {})
+            headers.update(validators)
+            response = self._send(method, url, **dict(kwargs, headers=headers))
+            if response.status_code == 304:
+                cached = self._cache.revalidated(key)
+                if cached is not None:
+                    return cached
+                # Page was evicted in the meantime, download it again
+                response = self._send(method, url, **kwargs)
+        else:
+            response = self._send(method, url, **kwargs)
+        self._checked(response)
+        if self._cache.cacheable(response):
+            self._cache.save(key, response)
+        return response
+
+    @staticmethod
+    def _checked(response):
+        """
+        Raise HTTPError if the response has transient status.
+        :param response: requests.Response
+        :return: the response
+        """
+        if response.status_code in TRANSIENT_STATUS_CODES:
+            raise requests.exceptions.HTTPError("%d response: %s" % (response.status_code, response.url),
+                                                response=response)
+        return response
+
+    def _send(self, method, url, **kwargs):
+        """
+        Send request once the limiter of the host allows it, and report its outcome to the limiter.
+        :param method: HTTP method
+        :param url: url
+        :param kwargs: optional arguments that requests takes
+        :return: requests.Response
+        """
+        if self._limiter is None:
+            return self._session.request(method, url, **kwargs)
+        host_limiter = self._limiter.host(urlparse(url).netloc)
+        host_limiter.acquire()
+        start = time.monotonic()
+        response = None
+        try:
+            response = self._session.request(method, url, **kwargs)
+            return response
+        finally:
+            if response is None:
+                host_limiter.release(None, time.monotonic() - start)
+            else:
+                host_limiter.release(response.status_code, time.monotonic() - start,
+                                     response.headers.get('Retry-After'))
+
+    def close(self):
+        """
+        Close all pooled connections.
+        :return:
+        """
+        self._session.close()
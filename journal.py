@@ -0,0 +1,88 @@
+"""
+Crawl journal.
+"""
+
+import os
+
+DONE = 'done'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+
+
+class CrawlJournal:
+    """
+    Append-only journal of scraped articles. Each line holds article ID and status of the article: done (saved to
+    file), failed (exception raised while scraping) or skipped (scraper returned no article). When an article is
+    recorded more than once, the last status counts.
+    """
+
+    def __init__(self, file_path):
+        """
+        Constructor.
+        :param file_path: path of the journal file
+        """
+        self._file_path = file_path
+        # Whether the last line was not completely written, so the next record has to start on a new line
+        self._torn = False
+        self._statuses = self._load()
+        self._file = None
+
+    def _load(self):
+        """
+        Load statuses from the journal file. Last line is ignored if it was not completely written, and the next
+        record starts on a new line.
+        :return: dictionary article ID: status
+        """
+        statuses = {}
+        if not os.path.isfile(self._file_path):
+            return statuses
+        with open(self._file_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.endswith('\n'):
+                    self._torn = True
+                    break
+                article_id, _, status = line.rstrip('\n').partition('\t')
+                if status in (DONE, FAILED, SKIPPED):
+                    statuses[article_id] = status
+        return statuses
+
+    def status(self, article_id):
+        """
+        Returns last recorded status of the article.
+        :param article_id: id of the article
+        :return: status, or None if article was never recorded
+        """
+        return self._statuses.get(article_id)
+
+    def record(self, article_id, status):
+        """
+        Append status of the article to the journal. Every record is a single unbuffered write of a whole line, so
+        the file never contains a partially written record, except the last one after a crash.
+        :param article_id: id of the article
+        :param status: DONE, FAILED or SKIPPED
+        :return:
+        """
+        line = "%s\t%s\n" % (article_id, status)
+        if self._file is None:
+            os.makedirs(os.path.dirname(self._file_path), exist_ok=True)
+            self._file = open(self._file_path, 'ab', buffering=0)
+            if self._torn:
+                line = "\n%s" % line
+                self._torn = False
+        self._file.write(line.encode('utf-8'))
+        self._statuses[article_id] = status
+
+    def close(self):
+        """
+        Close the journal file.
+        :return:
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
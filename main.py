@@ -1,45 +1,121 @@
 """
 Main method.
 """
-from Alo.scraper_alo import ScraperAlo
-from Delo.scraper_delo import ScraperDelo
-from Dnevnik.scraper_dnevnik import ScraperDnevnik
-from Kurir.scraper_kurir import ScraperKurir
-from Politika.scraper_politika import ScraperPolitika
-from Slovenske_novice.scraper_novice import ScraperNovice
-from Srbija_danas.scraper_srbija_danas import ScraperSrbijaDanas
-from Svet24.scraper_svet24 import ScraperSvet24
-from Večer.scraper_vecer import ScraperVecer
-
-# from ur24.scraper_24ur import ScraperUr24
+import argparse
+import importlib
+import logging
+import sys
+from concurrent.futures import ProcessPoolExecutor
 
-if __name__ == "__main__":
-    # scraper_politika = ScraperPolitika()
-    # scraper_politika.scrape()
+import constants
+
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(message)s',
+                    handlers=[logging.FileHandler("../debug.log"),
+                              logging.StreamHandler()])
+
+# Module and class of the scraper for each site. Modules are imported in the worker process, so 24ur starts
+# Selenium only when it is scraped.
+scrapers = {
+    "Politika": ("Politika.scraper_politika", "ScraperPolitika"),
+    "Kurir": ("Kurir.scraper_kurir", "ScraperKurir"),
+    "Alo": ("Alo.scraper_alo", "ScraperAlo"),
+    "Srbija_danas": ("Srbija_danas.scraper_srbija_danas", "ScraperSrbijaDanas"),
+    "Delo": ("Delo.scraper_delo", "ScraperDelo"),
+    'Slovenske_novice': ("Slovenske_novice.scraper_novice", "ScraperNovice"),
+    'Dnevnik': ("Dnevnik.scraper_dnevnik", "ScraperDnevnik"),
+    'Večer': ("Večer.scraper_vecer", "ScraperVecer"),
+    'Svet24': ("Svet24.scraper_svet24", "ScraperSvet24"),
+    'ur24': ("ur24.scraper_24ur", "ScraperUr24"),
+}
 
-    # scraper_svet24 = ScraperSvet24()
-    # scraper_svet24.scrape()
 
-    # scraper_vecer = ScraperVecer()
-    # scraper_vecer.scrape()
+def run_scraper(site_name, max_workers=None, retry_failed=False, replay=False, incremental=False, redrive=False):
+    """
+    Scrape single site. Runs in a separate process.
+    :param site_name: name of the site, key of constants.site_ids
+    :param max_workers: number of articles scraped concurrently, scraper default if None
+    :param retry_failed: scrape again articles that failed in previous runs
+    :param replay: rebuild list of articles and articles from stored responses, without network calls
+    :param incremental: enumerate only dates after the previous enumeration, and scrape only new articles
+    :param redrive: scrape again only articles in the dead letter file
+    :return: summary returned by Scraper.scrape
+    """
+    module_name, class_name = scrapers[site_name]
+    scraper = getattr(importlib.import_module(module_name), class_name)()
+    if max_workers is not None:
+        scraper.max_workers = max_workers
+    return scraper.scrape(retry_failed=retry_failed, replay=replay, incremental=incremental, redrive=redrive)
 
-    # scraper_novice = ScraperNovice()
-    # scraper_novice.scrape()
 
-    # scraper_delo = ScraperDelo()
-    # scraper_delo.scrape()
+def parse_workers(values):
+    """
+    Parse per-site worker budgets.
+    :param values: list of strings in format SITE=N
+    :return: dictionary site name: number of workers
+    """
+    workers = {}
+    for value in values:
+        site_name, _, number = value.partition('=')
+        if site_name not in constants.site_ids or not number.isdigit() or int(number) < 1:
+            raise argparse.ArgumentTypeError("Invalid worker budget: %s" % value)
+        workers[site_name] = int(number)
+    return workers
 
-    # scraper_24ur = ScraperUr24()
-    # scraper_24ur.scrape()
 
-    # scraper_dnevnik = ScraperDnevnik()
-    # scraper_dnevnik.scrape()
+def main(argv=None):
+    """
+    Scrape given sites concurrently, each one in its own process, and log summary for each site.
+    :param argv: command line arguments
+    :return: exit status, 0 if all sites were scraped, 1 otherwise
+    """
+    parser = argparse.ArgumentParser(description="Scrape articles and comments from newspaper sites.")
+    parser.add_argument('sites', nargs='*', metavar='SITE',
+                        help="sites to scrape, all if none given: %s" % ", ".join(constants.site_ids))
+    parser.add_argument('-w', '--workers', action='append', default=[], metavar='SITE=N',
+                        help="number of articles scraped concurrently for the site")
+    parser.add_argument('-p', '--processes', type=int, default=None,
+                        help="number of sites scraped concurrently, all given sites by default")
+    parser.add_argument('--retry-failed', action='store_true',
+                        help="scrape again articles that failed in previous runs")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--replay', action='store_true',
+                      help="rebuild list of articles and all articles from stored responses, without network calls")
+    mode.add_argument('--incremental', action='store_true',
+                      help="enumerate only dates after the previous run up to MAX_DATE, and scrape only new articles")
+    mode.add_argument('--redrive', action='store_true',
+                      help="scrape again only articles in the dead letter file of each site")
+    args = parser.parse_args(argv)
 
-    # scraper_kurir = ScraperKurir()
-    # scraper_kurir.scrape()
+    sites = args.sites or list(constants.site_ids)
+    unknown = [site_name for site_name in sites if site_name not in constants.site_ids]
+    if unknown:
+        parser.error("Unknown sites: %s" % ", ".join(unknown))
+    try:
+        workers = parse_workers(args.workers)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
 
-    # scraper_srbija_danas = ScraperSrbijaDanas()
-    # scraper_srbija_danas.scrape()
+    summaries = {}
+    with ProcessPoolExecutor(max_workers=args.processes or len(sites)) as executor:
+        futures = {site_name: executor.submit(run_scraper, site_name, workers.get(site_name), args.retry_failed,
+                                              args.replay, args.incremental, args.redrive)
+                   for site_name in sites}
+        for site_name, future in futures.items():
+            try:
+                summaries[site_name] = future.result()
+            except Exception:
+                logging.exception("Scraping %s failed." % site_name)
+                summaries[site_name] = None
 
-    scraper_alo = ScraperAlo()
-    scraper_alo.scrape()
+    for site_name, summary in summaries.items():
+        if summary is None:
+            logging.info("%s: failed" % site_name)
+        else:
+            logging.info("%s: %d articles, %d comments, %d errors" % (
+                site_name, summary['articles'], summary['comments'], summary['errors']))
+    return 0 if all(summary is not None for summary in summaries.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
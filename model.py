@@ -1,16 +1,15 @@
+import io
 import re
-from xml.etree.ElementTree import Element, SubElement, tostring
-from xml.sax.saxutils import unescape
-
-from transliterate import translit
 
 from constants import site_ids
+from transliteration import to_latin
 
 
 class Comment:
     """
     Class representing single article comment.
     """
+    __slots__ = ('id', 'parent_id', 'text')
 
     def __init__(self, comment_id, parent_comment_id, text):
         """
@@ -22,7 +21,10 @@ class Comment:
         self.id = comment_id
         self.parent_id = parent_comment_id
         self.text = self._format_comment(text)
-        self.text_transliterated = translit(self.text, 'sr', reversed=True)
+
+    @property
+    def text_transliterated(self):
+        return to_latin(self.text)
 
     def _format_comment(self, text):
         """
@@ -45,10 +47,54 @@ class Comment:
         return text.strip()
 
 
+class CommentTree:
+    """
+    Builds list of article comments with hierarchical IDs, from comments added in the order they should appear.
+    Top-level comments are numbered "1", "2", ... and each reply gets ID of its parent followed by its position among
+    replies of the parent: "1-1", "1-2", "1-2-1". Parent of top-level comment is empty. Positions are counted per
+    parent, so each comment is added in constant time.
+    """
+
+    def __init__(self):
+        self.comments = []
+        # Number of replies of each comment, '' for top-level comments
+        self._replies = {}
+
+    def add(self, text, parent_id=''):
+        """
+        Add comment after all comments added so far.
+        :param text: text of the comment
+        :param parent_id: ID of the parent comment, returned when it was added, empty for top-level comment
+        :return: ID of the added comment
+        """
+        position = self._replies.get(parent_id, 0) + 1
+        self._replies[parent_id] = position
+        comment_id = "%s-%d" % (parent_id, position) if parent_id else str(position)
+        self.comments.append(Comment(comment_id, parent_id, text))
+        return comment_id
+
+    def add_tree(self, roots, get_text, get_replies, parent_id=''):
+        """
+        Add comments given as a tree. Each comment is followed by all its replies, before its next sibling. The tree
+        is walked with an explicit stack, so its depth is not limited by recursion.
+        :param roots: list of comments, in any format
+        :param get_text: function that returns text of a comment
+        :param get_replies: function that returns list of replies of a comment, or None
+        :param parent_id: ID of the parent of the roots, empty for top-level comments
+        :return:
+        """
+        stack = [(parent_id, root) for root in reversed(roots)]
+        while stack:
+            parent_id, comment = stack.pop()
+            comment_id = self.add(get_text(comment), parent_id)
+            stack.extend((comment_id, reply) for reply in reversed(get_replies(comment) or []))
+
+
 class ShortArticle:
     """
     Class representing article from list obtained by searching news.
     """
+    __slots__ = ('_keyword', '_url', '_title', '_time', '_site_name', '_site_id', '_article_id')
 
     def __init__(self, keyword, url, title, time, site_name, article_id=None):
         """
@@ -61,7 +107,6 @@ class ShortArticle:
         self._url = url
         self._title = title
         self._time = time
-        self._title_transliterated = translit(self._title, 'sr', reversed=True)
         self._site_name = site_name
         self._site_id = site_ids[site_name]
         self._article_id = article_id
@@ -81,7 +126,6 @@ class ShortArticle:
     @title.setter
     def title(self, title):
         self._title = title
-        self._title_transliterated = translit(self._title, 'sr', reversed=True)
 
     @property
     def time(self):
@@ -93,7 +137,7 @@ class ShortArticle:
 
     @property
     def tittle_transliterated(self):
-        return self._title_transliterated
+        return to_latin(self._title)
 
     @property
     def site_name(self):
@@ -112,7 +156,7 @@ class ShortArticle:
         self._article_id = article_id
 
     def __gt__(self, other):
-        return self._title_transliterated > other.tittle_transliterated
+        return self.tittle_transliterated > other.tittle_transliterated
 
     def __hash__(self):
         return hash(self._url)
@@ -120,11 +164,21 @@ class ShortArticle:
     def __eq__(self, other):
         return self._url == other.url
 
+    def __getstate__(self):
+        return {name: getattr(self, name) for cls in type(self).__mro__ for name in getattr(cls, '__slots__', ())}
+
+    def __setstate__(self, state):
+        # Lists of articles pickled by older versions contain instance dictionary, with transliterated title
+        for name, value in state.items():
+            if name != '_title_transliterated':
+                setattr(self, name, value)
+
 
 class Article(ShortArticle):
     """
     Class representing single article. Extends ListArticle
     """
+    __slots__ = ('document_name', 'source_id', 'source_name', 'local_id', 'text', 'author', 'comments')
 
     def __init__(self, short_article: ShortArticle, text, author, comments):
         super().__init__(short_article.keyword, short_article.url, short_article.title, short_article.time,
@@ -137,88 +191,100 @@ class Article(ShortArticle):
         self.source_name = short_article.site_name
         # Article ID: 123
         self.local_id = short_article.id.split("%s-" % short_article.site_id)[-1]
-        # Transliterated article title
-        self.title_transliterated = short_article.tittle_transliterated
         # Article text
         self.text = text
         # Article author
-        self.author = translit(author.strip(), 'sr', reversed=True)
-        # Article text transliterated
-        self.text_transliterated = translit(self.text, 'sr', reversed=True)
+        self.author = to_latin(author.strip())
         # Article comments
         self.comments = comments
 
+    @property
+    def title_transliterated(self):
+        return self.tittle_transliterated
+
+    @property
+    def text_transliterated(self):
+        return to_latin(self.text)
+
     def convert_to_xml(self):
         """
         Convert article to XML.
         :return:
         """
-        document = Element('document', attrib={'global-id': self.document_name.split(".")[0]})
-        # Url
-        url = SubElement(document, 'url')
-        url.text = self._url
-        # Source ID
-        source_id = SubElement(document, 'source-id')
-        source_id.text = self.source_id
-        # Local ID
-        local_id = SubElement(document, 'local-id')
-        local_id.text = self.local_id
-        # Source name
-        source_name = SubElement(document, 'source-name')
-        source_name.text = self.source_name
+        xml = io.StringIO()
+        self.write_xml(xml)
+        return xml.getvalue()
+
+    def write_xml(self, f):
+        """
+        Write article to the file as XML, element by element, so the whole document is never held in memory.
+        Element text is written unescaped.
+        :param f: text file
+        :return:
+        """
+        f.write('<document global-id="%s">' % _escape_attribute(self.document_name.split(".")[0]))
+        _write_element(f, 'url', self._url)
+        _write_element(f, 'source-id', self.source_id)
+        _write_element(f, 'local-id', self.local_id)
+        _write_element(f, 'source-name', self.source_name)
 
         # Article
-        article = SubElement(document, 'article')
-        # Article title
-        article_title = SubElement(article, 'article-title')
-        article_title.text = self._title
-        # Article title transliterated
-        article_title_transliterated = SubElement(article, 'article-title-transliterated')
-        article_title_transliterated.text = self.title_transliterated
-        # Article time
-        article_time = SubElement(article, 'article-time')
-        article_time.text = self._time
-        # Article author
-        article_author = SubElement(article, 'article-author')
-        article_author.text = self.author
-        # Article text
-        article_text = SubElement(article, 'article-text')
-        article_text.text = self.text
-        # Article text transliterated
-        article_text_transliterated = SubElement(article, 'article-text-transliterated')
-        article_text_transliterated.text = self.text_transliterated
+        f.write('<article>')
+        _write_element(f, 'article-title', self._title)
+        _write_element(f, 'article-title-transliterated', self.title_transliterated)
+        _write_element(f, 'article-time', self._time)
+        _write_element(f, 'article-author', self.author)
+        _write_element(f, 'article-text', self.text)
+        _write_element(f, 'article-text-transliterated', self.text_transliterated)
+        f.write('</article>')
 
         # Comments
-        comments = SubElement(document, 'comments')
-        # Comments count
-        comments_count = SubElement(comments, 'comments-count')
-        comments_count.text = str(len(self.comments))
-        # Comments list
-        comments_list = SubElement(comments, 'comment-list')
-        for c in self.comments:
-            # Comment
-            comment = SubElement(comments_list, 'comment', attrib={'comment-id': c.id})
-            # Comment parent ID
-            comment_parent_id = SubElement(comment, 'comment-parent-id')
-            comment_parent_id.text = c.parent_id
-            # Comment text
-            comment_text = SubElement(comment, 'comment-text')
-            comment_text.text = c.text
-            # Comment text transliterated
-            comment_text_transliterated = SubElement(comment, 'comment-text-transliterated')
-            comment_text_transliterated.text = c.text_transliterated
-
-        xml_string = tostring(document, encoding='utf-8', method='xml')
-        return unescape(xml_string.decode('utf-8'))
+        f.write('<comments>')
+        _write_element(f, 'comments-count', str(len(self.comments)))
+        if not self.comments:
+            f.write('<comment-list />')
+        else:
+            f.write('<comment-list>')
+            for c in self.comments:
+                f.write('<comment comment-id="%s">' % _escape_attribute(c.id))
+                _write_element(f, 'comment-parent-id', c.parent_id)
+                _write_element(f, 'comment-text', c.text)
+                _write_element(f, 'comment-text-transliterated', c.text_transliterated)
+                f.write('</comment>')
+            f.write('</comment-list>')
+        f.write('</comments>')
+        f.write('</document>')
 
     def save_to_file(self, file_name):
         """
         Save Article to XML file.
         :return:
         """
-        xml = self.convert_to_xml()
         with open(file_name, 'w', encoding='utf-8') as f:
-            f.write(xml)
+            self.write_xml(f)
+
+
+def _write_element(f, tag, text):
+    """
+    Write element without attributes. Empty element is written as self-closing tag.
+    :param f: text file
+    :param tag: name of the element
+    :param text: text of the element
+    :return:
+    """
+    if text:
+        f.write('<%s>%s</%s>' % (tag, text, tag))
+    else:
+        f.write('<%s />' % tag)
+
+
+def _escape_attribute(value):
+    """
+    Escape attribute value. Ampersand and angle brackets are left as they are, like in element text.
+    :param value: attribute value
+    :return:
+    """
+    return value.replace('"', '&quot;').replace('\r', '&#13;').replace('\n', '&#10;').replace('\t', '&#09;')
 
 
 if __name__ == '__main__':
@@ -0,0 +1,147 @@
+"""
+Search queries of a site and their yield of new articles.
+"""
+
+import logging
+import os
+
+import constants
+
+
+class QueryPlanner:
+    """
+    Plans search queries of a site and tracks how many new articles each page of results yields. Keywords are
+    combined into fewer queries if the search of the site supports it. Canonical URLs of all articles found are kept,
+    so duplicates are dropped as soon as their page is added. Paging of a search stops after stale_pages consecutive
+    pages that contain only articles found before, by this or any earlier search. Pages must be added in the order
+    in which their articles are added to the list, so the same pages stop the search in every run.
+    """
+
+    def __init__(self, canonical_url, syntax=None, stale_pages=constants.QUERY_STALE_PAGES):
+        """
+        Constructor.
+        :param canonical_url: function that returns canonical form of article URL, under which duplicates are found
+        :param syntax: search syntax of the site, entry of constants.site_query_syntax, None for one query per keyword
+        :param stale_pages: number of consecutive pages without new articles after which paging stops, 0 never stops
+        """
+        self._canonical_url = canonical_url
+        self._syntax = syntax or {}
+        self._stale_pages = stale_pages
+        self._seen = set()
+        # Per search: number of consecutive stale pages
+        self._stale = {}
+        # Per query: [requested pages, new articles, articles found before, searches stopped, pages not requested]
+        self._stats = {}
+        self._keywords = 0
+
+    def queries(self, keywords):
+        """
+        Returns queries that find articles of all keywords.
+        :param keywords: list of keywords
+        :return: list of queries
+        """
+        self._keywords += len(keywords)
+        if 'or' in self._syntax:
+            return self._or_queries(keywords)
+        if 'prefix' in self._syntax:
+            return self._prefix_queries(keywords)
+        return list(keywords)
+
+    def _or_queries(self, keywords):
+        """
+        Join keywords with the operator into queries no longer than max_length.
+        :param keywords: list of keywords
+        :return: list of queries
+        """
+        operator = self._syntax['or']
+        max_length = self._syntax.get('max_length', 200)
+        queries = []
+        for keyword in keywords:
+            if queries and len(queries[-1]) + len(operator) + len(keyword) <= max_length:
+                queries[-1] = "%s%s%s" % (queries[-1], operator, keyword)
+            else:
+                queries.append(keyword)
+        return queries
+
+    def _prefix_queries(self, keywords):
+        """
+        Replace keywords with their common prefixes of at least min_prefix characters, followed by the wildcard.
+        Keywords without such prefix are searched as they are.
+        :param keywords: list of keywords
+        :return: list of queries
+        """
+        min_prefix = self._syntax.get('min_prefix', 5)
+        groups = []
+        for keyword in sorted(set(keywords)):
+            if groups:
+                prefix = os.path.commonprefix([groups[-1][0], keyword])
+                if len(prefix) >= min_prefix:
+                    groups[-1] = (prefix, groups[-1][1] + 1)
+                    continue
+            groups.append((keyword, 1))
+        return [prefix + self._syntax['prefix'] if size > 1 else prefix for prefix, size in groups]
+
+    def add_page(self, query, articles, search=None):
+        """
+        Record page of search results, and decide whether paging of the search should stop. Articles whose canonical
+        URL was seen before, on this or any earlier page, are dropped. Empty pages do not count as stale, because the
+        site may have filtered articles outside of the date range.
+        :param query: query of the search
+        :param articles: list of ShortArticle objects on the page
+        :param search: identifier of the search, if the query is searched more than once, e.g. for each year
+        :return: list of articles not seen before, and True if the search should stop
+        """
+        stats = self._query_stats(query)
+        stats[0] += 1
+        new_articles = []
+        for article in articles:
+            url = self._canonical_url(article.url)
+            if url not in self._seen:
+                self._seen.add(url)
+                new_articles.append(article)
+        stats[1] += len(new_articles)
+        stats[2] += len(articles) - len(new_articles)
+        key = (query, search)
+        if not articles:
+            return new_articles, False
+        if new_articles:
+            self._stale[key] = 0
+            return new_articles, False
+        self._stale[key] = self._stale.get(key, 0) + 1
+        if self._stale_pages and self._stale[key] >= self._stale_pages:
+            stats[3] += 1
+            return new_articles, True
+        return new_articles, False
+
+    def add_skipped_pages(self, query, number):
+        """
+        Record pages of the search that were not requested, because paging was stopped.
+        :param query: query of the search
+        :param number: number of pages
+        :return:
+        """
+        self._query_stats(query)[4] += number
+
+    def _query_stats(self, query):
+        if query not in self._stats:
+            self._stats[query] = [0, 0, 0, 0, 0]
+        return self._stats[query]
+
+    @property
+    def requests_saved(self):
+        """
+        Returns number of search result pages that were not requested because of stopped paging.
+        :return: number of pages
+        """
+        return sum(stats[4] for stats in self._stats.values())
+
+    def report(self):
+        """
+        Log yield of each query and number of requests saved.
+        :return:
+        """
+        for query, (pages, new, found, stopped, skipped) in self._stats.items():
+            logging.info("Query %s: %d pages, %d new articles, %d found before, %d searches stopped, %d pages not "
+                         "requested." % (query, pages, new, found, stopped, skipped))
+        logging.info("%d keywords searched with %d queries, %d pages requested, %d pages not requested." % (
+            self._keywords, len(self._stats), sum(stats[0] for stats in self._stats.values()), self.requests_saved))
@@ -0,0 +1,138 @@
+"""
+Per-host politeness limits of HTTP requests.
+"""
+
+import logging
+import threading
+import time
+
+
+class HostLimiter:
+    """
+    Limits requests to a single host. Requests are started at most at the current rate, with bursts of the given size
+    (token bucket), and at most limit requests are in flight at the same time. Both adapt to the host (AIMD): the
+    limit grows by one for each limit of requests answered in time, and the rate by one request per second for each
+    rate of them. Both are halved when the host answers 429 or 503, fails to answer, or answers slower than
+    slow_response seconds. After 429 or 503 no request is started until Retry-After, or pause seconds, passed.
+    """
+
+    def __init__(self, host, rate, min_rate, max_rate, burst, min_concurrency, max_concurrency, slow_response, pause):
+        """
+        Constructor.
+        :param host: host name, used in log messages
+        :param rate: requests started per second at the start
+        :param min_rate: lower bound of the rate
+        :param max_rate: upper bound of the rate
+        :param burst: maximum number of requests started at once after the host was idle
+        :param min_concurrency: lower bound of the concurrency limit
+        :param max_concurrency: upper bound of the concurrency limit
+        :param slow_response: response time in seconds above which the host is considered overloaded
+        :param pause: seconds without requests after 429 or 503 without Retry-After header
+        """
+        self._host = host
+        self._min_rate = min_rate
+        self._max_rate = max_rate
+        self._burst = burst
+        self._min_concurrency = min_concurrency
+        self._max_concurrency = max_concurrency
+        self._slow_response = slow_response
+        self._pause = pause
+
+        self._condition = threading.Condition()
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._resume_at = 0
+        self._in_flight = 0
+        # Starts low and grows while the host answers in time
+        self.limit = float(min_concurrency)
+        # Starts at the configured rate and grows while the host answers in time
+        self.rate = float(rate)
+
+    def acquire(self):
+        """
+        Wait until request to the host can be started.
+        :return:
+        """
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self._burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if now < self._resume_at:
+                    self._condition.wait(self._resume_at - now)
+                elif self._in_flight >= int(self.limit):
+                    self._condition.wait()
+                elif self._tokens < 1:
+                    self._condition.wait((1 - self._tokens) / self.rate)
+                else:
+                    self._tokens -= 1
+                    self._in_flight += 1
+                    return
+
+    def release(self, status_code, elapsed, retry_after=None):
+        """
+        Record outcome of the request and adapt the rate and the concurrency limit.
+        :param status_code: HTTP status of the response, None if request failed
+        :param elapsed: response time in seconds
+        :param retry_after: value of Retry-After header, if any
+        :return:
+        """
+        with self._condition:
+            self._in_flight -= 1
+            if status_code in (429, 503):
+                self._resume_at = max(self._resume_at, time.monotonic() + self._retry_delay(retry_after))
+                self._decrease("status %d" % status_code)
+            elif status_code is None:
+                self._decrease("request failed")
+            elif elapsed > self._slow_response:
+                self._decrease("response took %.1f s" % elapsed)
+            else:
+                self.limit = min(self._max_concurrency, self.limit + 1 / self.limit)
+                self.rate = min(self._max_rate, self.rate + 1 / self.rate)
+            self._condition.notify_all()
+
+    def _decrease(self, reason):
+        self.limit = max(self._min_concurrency, self.limit / 2)
+        self.rate = max(self._min_rate, self.rate / 2)
+        logging.warning("Host %s overloaded (%s), concurrency limit %.1f, rate %.1f/s." %
+                        (self._host, reason, self.limit, self.rate))
+
+    def _retry_delay(self, retry_after):
+        """
+        Returns seconds to wait after 429 or 503.
+        :param retry_after: value of Retry-After header, seconds or HTTP date
+        :return: seconds
+        """
+        if retry_after is not None and retry_after.strip().isdigit():
+            return int(retry_after)
+        return self._pause
+
+
+class RateLimiter:
+    """
+    Limiters of all hosts a scraper requests. Each host gets its own HostLimiter, with limits given for the host or
+    default limits.
+    """
+
+    def __init__(self, default_limits, host_limits=None):
+        """
+        Constructor.
+        :param default_limits: dictionary of HostLimiter arguments, except host
+        :param host_limits: dictionary host: limits that override default limits for the host
+        """
+        self._default_limits = default_limits
+        self._host_limits = host_limits or {}
+        self._lock = threading.Lock()
+        self._hosts = {}
+
+    def host(self, host):
+        """
+        Returns limiter of the host.
+        :param host: host name
+        :return: HostLimiter
+        """
+        with self._lock:
+            if host not in self._hosts:
+                limits = dict(self._default_limits, **self._host_limits.get(host, {}))
+                self._hosts[host] = HostLimiter(host, **limits)
+            return self._hosts[host]
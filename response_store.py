@@ -0,0 +1,104 @@
+"""
+Content-addressed store of raw HTTP responses.
+"""
+
+import gzip
+import hashlib
+import io
+import json
+import os
+import tempfile
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+
+def compress(data):
+    """
+    Compress data with gzip. Modification time in the header is zero, so the same data is always compressed to the
+    same bytes. gzip.compress takes mtime only since Python 3.8.
+    :param data: bytes
+    :return: compressed bytes
+    """
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode='wb', compresslevel=6, mtime=0) as f:
+        f.write(data)
+    return buffer.getvalue()
+
+
+class ResponseStore:
+    """
+    On-disk store of raw responses, keyed by request method, URL and body (see http_client.request_key). Response
+    content is compressed and saved once under its SHA-256 digest in objects/, so identical pages are stored only
+    once. For each request a small JSON file in requests/ holds status, headers and digest of the content. Both are
+    written to a temporary file and moved into place, so the store never holds a partially written file. When the
+    same request is saved again, the last response counts.
+    """
+
+    def __init__(self, folder):
+        """
+        Constructor.
+        :param folder: root folder of the store
+        """
+        self._folder = folder
+
+    def save(self, key, response):
+        """
+        Save response of the request.
+        :param key: key of the request
+        :param response: requests.Response
+        :return:
+        """
+        content = response.content
+        content_digest = hashlib.sha256(content).hexdigest()
+        object_path = self._path('objects', content_digest)
+        if not os.path.isfile(object_path):
+            self._write(object_path, compress(content))
+        meta = {
+            'url': response.url,
+            'status': response.status_code,
+            'reason': response.reason,
+            'headers': dict(response.headers),
+            'encoding': response.encoding,
+            'content': content_digest,
+        }
+        self._write(self._path('requests', key), json.dumps(meta).encode('utf-8'))
+
+    def load(self, key):
+        """
+        Load saved response of the request.
+        :param key: key of the request
+        :return: requests.Response, or None if response of the request was never saved
+        """
+        try:
+            with open(self._path('requests', key), 'rb') as f:
+                meta = json.loads(f.read().decode('utf-8'))
+            with open(self._path('objects', meta['content']), 'rb') as f:
+                content = gzip.decompress(f.read())
+        except FileNotFoundError:
+            return None
+        response = requests.Response()
+        response.url = meta['url']
+        response.status_code = meta['status']
+        response.reason = meta['reason']
+        response.headers = CaseInsensitiveDict(meta['headers'])
+        response.encoding = meta['encoding']
+        response._content = content
+        return response
+
+    def _path(self, kind, digest):
+        return os.path.join(self._folder, kind, digest[:2], digest)
+
+    @staticmethod
+    def _write(path, data):
+        """
+        Write file atomically.
+        :param path: path of the file
+        :param data: bytes
+        :return:
+        """
+        folder = os.path.dirname(path)
+        os.makedirs(folder, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=folder, delete=False) as f:
+            f.write(data)
+        os.replace(f.name, path)
@@ -0,0 +1,254 @@
+"""
+Retries of failed requests and dead letters of articles that could not be scraped.
+"""
+
+import heapq
+import json
+import logging
+import os
+import random
+import time
+from datetime import datetime
+
+import requests
+
+import constants
+from http_client import TRANSIENT_STATUS_CODES
+
+
+class TransientError(Exception):
+    """
+    Raised when a page could not be loaded for a reason that may pass, e.g. the page did not load in time.
+    """
+
+
+class PermanentError(Exception):
+    """
+    Raised when an article can not be scraped and loading it again does not help, e.g. its page has unexpected
+    structure.
+    """
+
+
+def is_transient(error):
+    """
+    Returns whether the request may succeed if it is sent again. Connection errors, timeouts, and responses with
+    status 429 or 5xx (raised by HttpClient as HTTPError) are transient. Errors of parsing and all other errors are
+    permanent.
+    :param error: exception
+    :return: True if error is transient
+    """
+    if isinstance(error, TransientError):
+        return True
+    if isinstance(error, requests.exceptions.HTTPError):
+        return error.response is not None and error.response.status_code in TRANSIENT_STATUS_CODES
+    return isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                              requests.exceptions.ChunkedEncodingError, requests.exceptions.ContentDecodingError))
+
+
+def backoff_delay(attempt, base_delay=constants.RETRY_BASE_DELAY, max_delay=constants.RETRY_MAX_DELAY):
+    """
+    Returns delay before the next attempt: random time up to exponentially growing bound (full jitter), so workers
+    that failed together do not retry together.
+    :param attempt: number of the failed attempt, starting with 1
+    :param base_delay: bound of the delay after the first attempt, in seconds
+    :param max_delay: largest bound of the delay, in seconds
+    :return: delay in seconds
+    """
+    return random.uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1)))
+
+
+def retrying(function, attempts=constants.RETRY_ATTEMPTS):
+    """
+    Returns function that calls the given function again after transient errors, waiting with backoff in between.
+    Permanent errors, and the transient error of the last attempt, are raised.
+    :param function: function to call
+    :param attempts: maximum number of calls
+    :return: function with the same arguments
+    """
+    def call(*args, **kwargs):
+        attempt = 1
+        while True:
+            try:
+                return function(*args, **kwargs)
+            except Exception as e:
+                if attempt >= attempts or not is_transient(e):
+                    raise
+                delay = backoff_delay(attempt)
+                logging.warning("Attempt %d failed (%s), retrying in %.1f s." % (attempt, e, delay))
+                time.sleep(delay)
+                attempt += 1
+    return call
+
+
+class RetryQueue:
+    """
+    Bounded queue of items that wait to be retried. Items are taken out when their delay passed, so the caller never
+    waits for a single item while others are ready.
+    """
+
+    def __init__(self, max_size=constants.RETRY_QUEUE_SIZE):
+        """
+        Constructor.
+        :param max_size: maximum number of waiting items
+        """
+        self._max_size = max_size
+        self._heap = []
+        self._counter = 0
+
+    def push(self, item, delay):
+        """
+        Add item that is ready after the delay.
+        :param item: item to retry
+        :param delay: delay in seconds
+        :return: False if the queue is full and item was not added
+        """
+        if len(self._heap) >= self._max_size:
+            return False
+        # Counter keeps items with the same ready time in order, and items are never compared
+        heapq.heappush(self._heap, (time.monotonic() + delay, self._counter, item))
+        self._counter += 1
+        return True
+
+    def pop_ready(self):
+        """
+        Take out all items whose delay passed.
+        :return: list of items
+        """
+        ready = []
+        now = time.monotonic()
+        while self._heap and self._heap[0][0] <= now:
+            ready.append(heapq.heappop(self._heap)[2])
+        return ready
+
+    def next_delay(self):
+        """
+        Returns time until the next item is ready.
+        :return: delay in seconds, None if the queue is empty
+        """
+        if not self._heap:
+            return None
+        return max(0, self._heap[0][0] - time.monotonic())
+
+    def __len__(self):
+        return len(self._heap)
+
+
+class DeadLetters:
+    """
+    Append-only file of articles that could not be scraped, with the last error and number of attempts. Each line is
+    a JSON object. An article that was later scraped is recorded as resolved. When an article is recorded more than
+    once, the last record counts.
+    """
+
+    def __init__(self, file_path):
+        """
+        Constructor.
+        :param file_path: path of the dead letter file
+        """
+        self._file_path = file_path
+        # Whether the last line was not completely written, so the next record has to start on a new line
+        self._torn = False
+        self._letters = self._load()
+        self._file = None
+
+    def _load(self):
+        """
+        Load dead letters from the file. Last line is ignored if it was not completely written, and the next record
+        starts on a new line. Lines that are not valid JSON are skipped.
+        :return: dictionary article ID: dead letter
+        """
+        letters = {}
+        if not os.path.isfile(self._file_path):
+            return letters
+        with open(self._file_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.endswith('\n'):
+                    self._torn = True
+                    break
+                try:
+                    letter = json.loads(line)
+                except ValueError:
+                    logging.warning("Invalid dead letter skipped: %s" % line.strip())
+                    continue
+                if letter.get('resolved'):
+                    letters.pop(letter['id'], None)
+                else:
+                    letters[letter['id']] = letter
+        return letters
+
+    @property
+    def article_ids(self):
+        """
+        Returns IDs of articles that are not resolved.
+        :return: set of article IDs
+        """
+        return set(self._letters)
+
+    def record(self, article_id, url, error, attempts):
+        """
+        Append article that could not be scraped.
+        :param article_id: id of the article
+        :param url: url of the article
+        :param error: exception of the last attempt
+        :param attempts: number of attempts
+        :return:
+        """
+        letter = {'id': article_id, 'url': url, 'error': "%s: %s" % (type(error).__name__, error),
+                  'transient': is_transient(error), 'attempts': attempts, 'time': datetime.now().isoformat()}
+        self._write(letter)
+        self._letters[article_id] = letter
+
+    def resolve(self, article_id):
+        """
+        Record that the article was scraped.
+        :param article_id: id of the article
+        :return:
+        """
+        if article_id in self._letters:
+            self._write({'id': article_id, 'resolved': True})
+            del self._letters[article_id]
+
+    def _write(self, letter):
+        """
+        Append the record as a single unbuffered write of a whole line.
+        :param letter: dictionary
+        :return:
+        """
+        line = "%s\n" % json.dumps(letter, ensure_ascii=False)
+        if self._file is None:
+            os.makedirs(os.path.dirname(self._file_path), exist_ok=True)
+            self._file = open(self._file_path, 'ab', buffering=0)
+            if self._torn:
+                line = "\n%s" % line
+                self._torn = False
+        self._file.write(line.encode('utf-8'))
+
+    def compact(self):
+        """
+        Rewrite the file with only articles that are not resolved.
+        :return:
+        """
+        self.close()
+        if not os.path.isfile(self._file_path):
+            return
+        tmp_path = "%s.tmp" % self._file_path
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for letter in self._letters.values():
+                f.write("%s\n" % json.dumps(letter, ensure_ascii=False))
+        os.replace(tmp_path, self._file_path)
+        self._torn = False
+
+    def close(self):
+        """
+        Close the dead letter file.
+        :return:
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -8,23 +8,79 @@ import logging
 import os
 import pickle
 import re
-import shutil
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime, timedelta
+from urllib.parse import urlparse, urlsplit, urlunsplit
 
-import requests
+from bs4 import BeautifulSoup, SoupStrainer
 
 import constants
-from model import ShortArticle, Comment
+from cleanup import Cleaner
+from http_cache import HttpCache
+from http_client import HttpClient
+from journal import CrawlJournal, DONE, FAILED, SKIPPED
+from model import ShortArticle, CommentTree
+from query_planner import QueryPlanner
+from rate_limiter import RateLimiter
+from response_store import ResponseStore
+from retry import DeadLetters, RetryQueue, backoff_delay, is_transient, retrying
+from text_extraction import TextExtractor
 
 logging.basicConfig(level=logging.INFO,
                     format='%(asctime)s - %(levelname)s - %(message)s',
                     handlers=[logging.FileHandler("../debug.log"),
                               logging.StreamHandler()])
 
+def has_class(*class_names):
+    """
+    Returns matcher of class attribute for SoupStrainer. Like class_ argument of find_all, it matches if one of the
+    classes of the tag, or the whole class attribute, equals one of the given names.
+    :param class_names: class names
+    :return: function that takes value of class attribute
+    """
+    class_names = set(class_names)
+
+    def match(value):
+        if value is None:
+            return False
+        classes = value.split() if isinstance(value, str) else value
+        return " ".join(classes) in class_names or any(c in class_names for c in classes)
+
+    return match
+
+
+def strainer(name, *class_names, **attrs):
+    """
+    Returns SoupStrainer that keeps only tags with the given name and one of the given classes, or attributes.
+    :param name: tag name
+    :param class_names: class names
+    :param attrs: other attributes that tag must have
+    :return: SoupStrainer
+    """
+    if class_names:
+        attrs['class'] = has_class(*class_names)
+    return SoupStrainer(name, attrs)
+
 
 class Scraper:
     """
     Scraper class.
     """
+    # Tags removed from article text, list of cleanup.Rule
+    _cleanup_rules = []
+    # Serializes cleaned article tag to text
+    _text_extractor = TextExtractor(constants.skip_tags)
+    # Whether all pages are fetched with HTTP client, so the site can be rebuilt from stored responses
+    _replay_supported = True
+    # Size of time windows searched separately by sites whose search takes a date range: 'year', 'month', or None
+    # to search the whole range at once
+    _window_size = 'year'
+    # Number of pages at which search results of a window are cut off by the site, so the window is halved. None if
+    # the site returns all pages.
+    _max_pages = None
 
     def __init__(self, site_name):
         self._site_name = site_name
@@ -32,37 +88,228 @@ class Scraper:
         self._generic_url = constants.site_urls[site_name]
         self._comments_url = constants.site_comments[site_name]
         self._articles = []
-
-    def scrape(self):
+        # Articles published within [min date, max date) are enumerated
+        self._min_date = constants.MIN_DATE
+        self._max_date = constants.MAX_DATE
+        self._max_workers = constants.MAX_WORKERS
+        self._store = ResponseStore('%s/data/responses' % site_name) if constants.STORE_RESPONSES else None
+        self._cache = HttpCache('%s/data/http_cache' % site_name,
+                                constants.HTTP_CACHE_SIZE) if constants.HTTP_CACHE_SIZE else None
+        self._limiter = self._create_limiter()
+        self._planner = QueryPlanner(self._canonical_url, constants.site_query_syntax.get(site_name))
+        self._client = self._create_client()
+        self._cleaner = Cleaner(self._cleanup_rules)
+
+    @property
+    def max_workers(self):
+        return self._max_workers
+
+    @max_workers.setter
+    def max_workers(self, max_workers):
+        self._max_workers = max_workers
+        self._client = self._create_client()
+
+    def _create_client(self, replay=False):
+        """
+        Create HTTP client with connection pool large enough for all workers and their concurrent comment requests.
+        :param replay: load responses from the response store instead of sending requests
+        :return: HttpClient
+        """
+        pool_maxsize = max(constants.HTTP_POOL_MAXSIZE, self._max_workers * constants.COMMENT_WORKERS)
+        return HttpClient(pool_maxsize=pool_maxsize, store=self._store, replay=replay, cache=self._cache,
+                          limiter=self._limiter)
+
+    def _create_limiter(self):
+        """
+        Create rate limiter with limits of the site for its own hosts, and Facebook limits for Facebook hosts. The
+        limiter is kept when the client is recreated, so limits learned about a host are not lost.
+        :return: RateLimiter
+        """
+        site_limits = dict(constants.RATE_LIMIT, **constants.site_rate_limits.get(self._site_name, {}))
+        facebook_hosts = {urlparse(url).netloc for url in
+                          (constants.FACEBOOK_COMMENTS_URL, constants.FACEBOOK_COMMENTS_URL_API)}
+        return RateLimiter(site_limits, {host: constants.FACEBOOK_RATE_LIMIT for host in facebook_hosts})
+
+    def scrape(self, retry_failed=False, replay=False, incremental=False, redrive=False):
         """
         Scrape articles as follows:
         1. Scrape URLs, and basic info for articles that match search criteria
         2. Remove all duplicates
         3. Sort articles alphabetically on title
         4. Create ID for each article
-        4. For each article scrape all information and save it to file
-        :return:
-        """
+        4. For each article that is not in the crawl journal scrape all information and save it to file
+        On the first run the list of articles is saved to file, later runs load it. In incremental mode only dates
+        after the high-water mark of the previous enumeration are enumerated again, and new articles are appended
+        to the list with IDs after the existing ones. In replay mode all responses are loaded from the response
+        store, all dates are enumerated again and all articles are rebuilt, regardless of the crawl journal. In
+        redrive mode only articles in the dead letter file are scraped.
+        :param retry_failed: scrape again articles that failed in previous runs
+        :param replay: rebuild list of articles and articles from stored responses, without network calls
+        :param incremental: enumerate only dates after the previous enumeration, and scrape only new articles
+        :param redrive: scrape again only articles in the dead letter file
+        :return: summary with number of saved articles, number of their comments and number of errors
+        """
+        if replay:
+            if self._store is None or not self._replay_supported:
+                raise ValueError("Responses of %s are not stored, it can not be replayed." % self._site_name)
+            self._client = self._create_client(replay=True)
         folder = '%s/data/' % self._site_name
         file_name = 'news_list'
         file_path = os.path.join(folder, file_name)
-        # If first run, save list of articles to file, otherwise load articles from file
-        if not os.path.isfile(file_path):
-            self._get_short_articles(self._site_id.split('-')[0])
-            self._remove_duplicates()
-            self._sort()
-            self._build_ids()
-
-            os.makedirs(os.path.dirname(folder), exist_ok=True)
-            with open(file_path, 'wb') as f:
-                pickle.dump(self._articles, f)
-                logging.info("%d articles successfully saved to file %s." % (len(self._articles), file_name))
-        else:
+        high_water_mark_path = os.path.join(folder, 'high_water_mark')
+        if os.path.isfile(file_path):
             with open(file_path, 'rb') as f:
                 self._articles = pickle.load(f)
                 logging.info("%d articles successfully loaded from file %s." % (len(self._articles), file_name))
 
-        self._get_full_articles()
+        # If first run, incremental run or replay, enumerate articles and save list of articles to file
+        if not self._articles or incremental or replay:
+            if self._articles and incremental:
+                self._min_date = self._load_high_water_mark(high_water_mark_path)
+                logging.info("Enumerating articles from %s to %s." % (self._min_date, self._max_date))
+            if self._min_date < self._max_date:
+                self._enumerate()
+                os.makedirs(os.path.dirname(folder), exist_ok=True)
+                self._save_articles(file_path)
+                logging.info("%d articles successfully saved to file %s." % (len(self._articles), file_name))
+                if not replay:
+                    with open(high_water_mark_path, 'w') as f:
+                        f.write(self._max_date.isoformat())
+            else:
+                logging.info("No dates after the previous enumeration.")
+
+        summary = self._get_full_articles(retry_failed, replay, redrive)
+        if self._cache is not None and self._cache.saved_bytes:
+            logging.info("%d bytes of unchanged pages were not downloaded again." % self._cache.saved_bytes)
+        return summary
+
+    def _enumerate(self):
+        """
+        Enumerate articles within [min date, max date). If there is no list of articles, new list is built. Otherwise
+        articles already in the list keep their IDs, and new articles are appended to the list.
+        :return:
+        """
+        known_articles = self._articles
+        self._articles = []
+        self._get_short_articles(self._site_id.split('-')[0])
+        self._planner.report()
+        self._remove_duplicates()
+        self._sort()
+        if not known_articles:
+            self._build_ids()
+        else:
+            self._append_new_articles(known_articles)
+
+    def _append_new_articles(self, known_articles):
+        """
+        Append enumerated articles that are not in the list of known articles to it. IDs of new articles follow the
+        largest existing ID, in alphabetical order of their titles, so IDs of known articles never change. Known
+        articles are compared by canonical URL.
+        :param known_articles: list of articles with IDs
+        :return:
+        """
+        known = {self._canonical_url(article.url) for article in known_articles}
+        new_articles = [article for article in self._articles if self._canonical_url(article.url) not in known]
+        last_position = max(int(article.id.rsplit('-', 1)[1]) for article in known_articles)
+        for position, article in enumerate(new_articles, last_position + 1):
+            article.id = "{}-{}".format(self._site_id, position)
+        logging.info("%d new articles of %d enumerated." % (len(new_articles), len(self._articles)))
+        self._articles = known_articles + new_articles
+
+    def _save_articles(self, file_path):
+        """
+        Save list of articles to file. List is written to a temporary file first, so the previous list is kept if
+        saving fails.
+        :param file_path: path of the file
+        :return:
+        """
+        with open(file_path + '.tmp', 'wb') as f:
+            pickle.dump(self._articles, f)
+        os.replace(file_path + '.tmp', file_path)
+
+    def _load_high_water_mark(self, file_path):
+        """
+        Returns end of the previous enumeration. Lists saved before high-water mark was recorded are enumerated from
+        the min date again, and only new articles are added to them.
+        :param file_path: path of the high-water mark file
+        :return: datetime
+        """
+        if not os.path.isfile(file_path):
+            logging.warning("No high-water mark in %s, enumerating from %s." % (file_path, self._min_date))
+            return self._min_date
+        with open(file_path, 'r') as f:
+            return datetime.fromisoformat(f.read().strip())
+
+    def _windows(self):
+        """
+        Split [min date, max date) into windows of _window_size. First and last window are clipped to the range.
+        :return: list of (start, end) pairs of datetime, end excluded
+        """
+        if self._window_size is None:
+            return [(self._min_date, self._max_date)]
+        windows = []
+        start = self._min_date
+        while start < self._max_date:
+            if self._window_size == 'year':
+                end = datetime(start.year + 1, 1, 1)
+            else:
+                end = datetime(start.year + start.month // 12, start.month % 12 + 1, 1)
+            windows.append((start, min(end, self._max_date)))
+            start = end
+        return windows
+
+    def _search_windows(self, queries):
+        """
+        Search each query in each time window of [min date, max date). Windows whose results reach _max_pages are
+        halved until they fit. All windows of all queries are searched concurrently, by workers of _search.
+        _get_keyword_number_of_pages and _get_articles_list get the window as keyword argument window.
+        :param queries: list of queries
+        :return: list of ShortArticle objects
+        """
+        searches = [(query, {'window': window}) for query in queries for window in self._windows()]
+        numbers_of_pages = None
+        if self._max_pages is not None:
+            searches, numbers_of_pages = self._split_windows(searches)
+        return self._search(searches, numbers_of_pages)
+
+    def _split_windows(self, searches):
+        """
+        Halve windows of searches whose number of pages reaches _max_pages, until it is below or the window is one day
+        long. Numbers of pages of each round of windows are requested concurrently.
+        :param searches: list of (query, {'window': (start, end)}) pairs
+        :return: list of searches, in order of queries and windows, and number of pages of each search
+        """
+        get_number_of_pages = retrying(self._get_keyword_number_of_pages)
+        order = {query: position for position, (query, _) in enumerate(searches)}
+        result = []
+        workers = min(self._max_workers, constants.MAX_WORKERS_PER_HOST)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while searches:
+                numbers_of_pages = list(executor.map(lambda search: get_number_of_pages(search[0], **search[1]),
+                                                     searches))
+                split = []
+                for (query, kwargs), number_of_pages in zip(searches, numbers_of_pages):
+                    start, end = kwargs['window']
+                    if number_of_pages >= self._max_pages and end - start > timedelta(days=1):
+                        middle = (start + (end - start) / 2).replace(microsecond=0)
+                        logging.info("Window %s - %s of %s has %d pages, halved." %
+                                     (start, end, query, number_of_pages))
+                        split.extend([(query, {'window': (start, middle)}), (query, {'window': (middle, end)})])
+                    else:
+                        result.append((query, kwargs, number_of_pages))
+                searches = split
+        result.sort(key=lambda search: (order[search[0]], search[1]['window']))
+        return [(query, kwargs) for query, kwargs, _ in result], [number for _, _, number in result]
+
+    @staticmethod
+    def _parse_html(markup, parse_only=None):
+        """
+        Parse HTML with the parser set in constants.HTML_PARSER.
+        :param markup: HTML string or bytes
+        :param parse_only: SoupStrainer, if given only matching tags and their subtrees are built
+        :return: BeautifulSoup object
+        """
+        return BeautifulSoup(markup, constants.HTML_PARSER, parse_only=parse_only)
 
     def get_formatted_article(self, text, lead=None):
         """
@@ -80,24 +327,25 @@ class Scraper:
             text = "%s%s\n%s" % (lead, point, text)
         return text
 
-    @staticmethod
-    def format_text(text):
+    def format_text(self, text):
         """
-        Format XML text.
+        Format XML text. Tags that match cleanup rules of the site are removed in a single traversal, followed by site
+        specific cleanup. Remaining tree, without skip tags, is serialized to text in another single traversal.
         :param text:
         :return:
         """
-        for skip_tag in constants.skip_tags:
-            for tag in text.findAll(skip_tag):
-                tag.decompose()
-        for br in text.findAll('br'):
-            br.replace_with("\n")
-        for tag in text.findAll('p'):
-            tag.string = "\n%s" % tag.text
-        cleared = text.text
-        cleared = re.sub(r'\n{2,}', r'\n', cleared)
-        cleared = cleared.strip()
-        return cleared
+        self._cleaner.clean(text)
+        self._clean(text)
+        return self._text_extractor.extract(text)
+
+    def _clean(self, text):
+        """
+        Site specific cleanup that can not be expressed with cleanup rules. Called after tags that match the rules are
+        removed, and before the text is extracted, so skip tags are still in the tree.
+        :param text: BeautifulSoup article tag
+        :return:
+        """
+        pass
 
     def _get_short_articles(self, lang):
         """
@@ -105,18 +353,112 @@ class Scraper:
         :return:
         """
         keywords = constants.keywords_serbian if lang == 'sr' else constants.keywords
-        for keyword in keywords:
-            logging.info("Keyword: %s" % keyword)
-            number_of_pages = self._get_keyword_number_of_pages(keyword)
+        self._articles.extend(self._search([(query, {}) for query in self._planner.queries(keywords)]))
+
+    def _search(self, searches, numbers_of_pages=None):
+        """
+        Scrape all search result pages for each search. If more than one worker is allowed, pages of all searches
+        are requested concurrently, otherwise one by one. Pages that fail with a transient error are requested again.
+        Paging of a search stops when the query planner finds its pages stale, and its remaining pages are not
+        requested.
+        :param searches: list of (keyword, kwargs) pairs, kwargs are passed to _get_keyword_number_of_pages and
+        _get_articles_list
+        :param numbers_of_pages: number of pages of each search, if already known
+        :return: list of ShortArticle objects, in the same order as if pages were scraped one by one
+        """
+        workers = min(self._max_workers, constants.MAX_WORKERS_PER_HOST)
+        if workers == 1:
+            return self._search_serial(searches, numbers_of_pages)
+
+        get_number_of_pages = retrying(self._get_keyword_number_of_pages)
+        get_articles_list = retrying(self._get_articles_list)
+        articles = []
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pages_futures = []
+            try:
+                if numbers_of_pages is None:
+                    numbers_of_pages = executor.map(
+                        lambda search: get_number_of_pages(search[0], **search[1]), searches)
+                for (keyword, kwargs), number_of_pages in zip(searches, numbers_of_pages):
+                    logging.info("Keyword: %s %s, number of pages: %s" % (keyword, kwargs, number_of_pages))
+                    futures = [executor.submit(get_articles_list, keyword, page_num, **kwargs)
+                               for page_num in range(1, number_of_pages + 1)]
+                    pages_futures.append((keyword, kwargs, futures))
+                # Pages are consumed in order, so the planner stops the same searches as if pages were scraped one by
+                # one. Pages of later searches wait in the queue of the executor, and are cancelled before requested.
+                for keyword, kwargs, futures in pages_futures:
+                    for page_index, future in enumerate(futures):
+                        articles_list, stop_iteration = future.result()
+                        stale = self._add_search_page(articles, keyword, articles_list, tuple(sorted(kwargs.items())))
+                        # Stop iteration if article is older than min date or pages are stale, drop remaining pages
+                        if stop_iteration or stale:
+                            cancelled = sum(remaining.cancel() for remaining in futures[page_index + 1:])
+                            if stale:
+                                self._planner.add_skipped_pages(keyword, cancelled)
+                            break
+            except BaseException:
+                for _, _, futures in pages_futures:
+                    for future in futures:
+                        future.cancel()
+                raise
+        return articles
+
+    def _search_serial(self, searches, numbers_of_pages=None):
+        """
+        Scrape all search result pages for each search, one page at a time.
+        :param searches: list of (keyword, kwargs) pairs
+        :param numbers_of_pages: number of pages of each search, if already known
+        :return: list of ShortArticle objects
+        """
+        get_number_of_pages = retrying(self._get_keyword_number_of_pages)
+        get_articles_list = retrying(self._get_articles_list)
+        articles = []
+        for position, (keyword, kwargs) in enumerate(searches):
+            logging.info("Keyword: %s %s" % (keyword, kwargs))
+            if numbers_of_pages is None:
+                number_of_pages = get_number_of_pages(keyword, **kwargs)
+            else:
+                number_of_pages = numbers_of_pages[position]
             logging.info("Number of pages: %s" % number_of_pages)
-            # TODO: change range to 1
             for page_num in range(1, number_of_pages + 1):
                 logging.info("%d" % page_num)
-                articles_list, stop_iteration = self._get_articles_list(keyword, page_num)
-                self._articles.extend(articles_list)
-                # Stop iteration if article is older than min date
-                if stop_iteration:
+                articles_list, stop_iteration = get_articles_list(keyword, page_num, **kwargs)
+                stale = self._add_search_page(articles, keyword, articles_list, tuple(sorted(kwargs.items())))
+                # Stop iteration if article is older than min date or pages are stale
+                if stop_iteration or stale:
+                    if stale:
+                        self._planner.add_skipped_pages(keyword, number_of_pages - page_num)
                     break
+        return articles
+
+    def _add_search_page(self, articles, query, page_articles, search=None):
+        """
+        Append articles on the page of search results that were not seen before to the list.
+        :param articles: list of articles found so far
+        :param query: query of the search
+        :param page_articles: list of ShortArticle objects on the page
+        :param search: identifier of the search, if the query is searched more than once
+        :return: True if paging of the search should stop
+        """
+        new_articles, stale = self._planner.add_page(query, page_articles, search)
+        articles.extend(new_articles)
+        return stale
+
+    def _canonical_url(self, url):
+        """
+        Returns canonical form of the article URL, used to find duplicates: https scheme, host in lowercase, path
+        without repeated and trailing slashes, query without tracking parameters, and no fragment. Articles keep the
+        URL they were found with, because Facebook comments are looked up by the exact URL.
+        :param url: url of the article
+        :return: canonical url
+        """
+        parts = urlsplit(url.strip())
+        path = re.sub('/{2,}', '/', parts.path)
+        if len(path) > 1:
+            path = path.rstrip('/')
+        query = '&'.join(parameter for parameter in parts.query.split('&')
+                         if parameter and parameter.split('=')[0] not in constants.TRACKING_PARAMETERS)
+        return urlunsplit(('https', parts.netloc.lower(), path, query, ''))
 
     def extend_short_articles(self, path=r'C:\Users\rape9001\Downloads\naslovi.json', newspaper=""):
         """
@@ -132,20 +474,24 @@ class Scraper:
 
     def _remove_duplicates(self):
         """
-        Remove duplicate articles from the list.
+        Remove duplicate articles from the list, keeping the first occurrence of each canonical URL. Articles found
+        by search are unique already, this removes articles added from other sources.
         :return:
         """
-        filtered = set(self._articles)
+        unique = {}
+        for article in self._articles:
+            unique.setdefault(self._canonical_url(article.url), article)
+        filtered = list(unique.values())
         logging.info(
             'Removed %d duplicates from %d articles.' % (len(self._articles) - len(filtered), len(self._articles)))
-        self._articles = list(set(filtered))
+        self._articles = filtered
 
     def _sort(self):
         """
         Sort list of articles alphabetically.
         :return:
         """
-        self._articles = sorted(self._articles)
+        self._articles = sorted(self._articles, key=lambda article: article.tittle_transliterated)
         logging.info("Articles successfully sorted alphabetically by title.")
 
     def _build_ids(self):
@@ -153,28 +499,113 @@ class Scraper:
         Create ID for each article in the list.
         :return:
         """
-        for article in self._articles:
-            article.id = "{}-{}".format(self._site_id, self._articles.index(article) + 1)
+        for position, article in enumerate(self._articles, 1):
+            article.id = "{}-{}".format(self._site_id, position)
         logging.info("IDs successfully built.")
 
-    def _get_full_articles(self):
+    def _get_full_articles(self, retry_failed=False, replay=False, redrive=False):
         """
-        Iterate through a list of articles, scrape all information for each article and save it to file.
-        :return:
+        Scrape all information for each article in the list and save it to file. Articles are scraped concurrently by
+        at most self._max_workers threads, and at most MAX_WORKERS_PER_HOST of them target the same host. Status of
+        each article is recorded in the crawl journal, and articles already recorded are not scraped again. Articles
+        that failed with a transient error wait in the retry queue and are scraped again after backoff, while other
+        articles are scraped. Articles that failed permanently, after RETRY_ATTEMPTS, or did not fit in the retry
+        queue are recorded as failed in the journal and in the dead letter file.
+        :param retry_failed: scrape again articles recorded as failed
+        :param replay: articles are rebuilt from stored responses, status is recorded in a new replay journal
+        :param redrive: scrape only articles in the dead letter file, and remove those that are scraped from it
+        :return: summary with number of saved articles, number of their comments and number of errors
         """
-        counter = 0
+        summary = {'articles': 0, 'comments': 0, 'errors': 0}
         folder = '%s/data/articles/' % self._site_name
-        for a in self._articles:
-            counter += 1
-            # if counter < 1957:
-            #     continue
-            logging.info("%d. Get article: %s" % (counter, a.url))
-            article = self._get_full_article(a)
-            if article is not None:
-                os.makedirs(os.path.dirname(folder), exist_ok=True)
-                article.save_to_file(os.path.join(folder, article.document_name))
-        shutil.make_archive(self._site_name, 'zip', folder)
-        shutil.move("%s.zip" % self._site_name, folder)
+        os.makedirs(os.path.dirname(folder), exist_ok=True)
+        journal_path = '%s/data/%s' % (self._site_name, 'replay_journal' if replay else 'journal')
+        dead_letters_path = '%s/data/%s' % (self._site_name, 'replay_dead_letters' if replay else 'dead_letters')
+        if replay:
+            for path in (journal_path, dead_letters_path):
+                if os.path.isfile(path):
+                    os.remove(path)
+        with CrawlJournal(journal_path) as crawl_journal, DeadLetters(dead_letters_path) as dead_letters:
+            if redrive:
+                dead_article_ids = dead_letters.article_ids
+                pending = [(counter, a) for counter, a in enumerate(self._articles, 1) if a.id in dead_article_ids]
+                logging.info("%d dead letters to redrive." % len(pending))
+            else:
+                pending = [(counter, a) for counter, a in enumerate(self._articles, 1)
+                           if crawl_journal.status(a.id) is None or
+                           (retry_failed and crawl_journal.status(a.id) == FAILED)]
+                logging.info("%d of %d articles already in journal." % (len(self._articles) - len(pending),
+                                                                        len(self._articles)))
+            hosts = {urlparse(a.url).netloc for _, a in pending}
+            semaphores = {host: threading.BoundedSemaphore(constants.MAX_WORKERS_PER_HOST) for host in hosts}
+            retry_queue = RetryQueue()
+            with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+                futures = {executor.submit(self._get_full_article_limited, a, counter, semaphores): (counter, a, 1)
+                           for counter, a in pending}
+                while futures or retry_queue:
+                    for counter, a, attempt in retry_queue.pop_ready():
+                        futures[executor.submit(self._get_full_article_limited, a, counter, semaphores)] = \
+                            (counter, a, attempt)
+                    if not futures:
+                        time.sleep(retry_queue.next_delay())
+                        continue
+                    done, _ = wait(futures, timeout=retry_queue.next_delay(), return_when=FIRST_COMPLETED)
+                    for future in done:
+                        counter, short_article, attempt = futures.pop(future)
+                        try:
+                            article = future.result()
+                        except Exception as e:
+                            if is_transient(e) and attempt < constants.RETRY_ATTEMPTS and \
+                                    retry_queue.push((counter, short_article, attempt + 1), backoff_delay(attempt)):
+                                logging.warning("Attempt %d of article %s failed (%s), retry queued." %
+                                                (attempt, short_article.url, e))
+                                continue
+                            logging.exception("Failed to get article: %s" % short_article.url)
+                            crawl_journal.record(short_article.id, FAILED)
+                            dead_letters.record(short_article.id, short_article.url, e, attempt)
+                            summary['errors'] += 1
+                            continue
+                        if article is not None:
+                            article.save_to_file(os.path.join(folder, article.document_name))
+                            crawl_journal.record(short_article.id, DONE)
+                            dead_letters.resolve(short_article.id)
+                            summary['articles'] += 1
+                            summary['comments'] += len(article.comments)
+                        else:
+                            crawl_journal.record(short_article.id, SKIPPED)
+                            dead_letters.resolve(short_article.id)
+                            summary['errors'] += 1
+            if redrive:
+                dead_letters.compact()
+        self._archive_articles(folder)
+        return summary
+
+    def _archive_articles(self, folder):
+        """
+        Zip article XML files of the folder into <site name>.zip in the same folder, replacing archive from the
+        previous run. Only XML files are archived, so the archive never contains the previous one.
+        :param folder: folder of article files
+        :return:
+        """
+        archive_path = os.path.join(folder, "%s.zip" % self._site_name)
+        tmp_path = "%s.tmp" % archive_path
+        with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for name in sorted(os.listdir(folder)):
+                if name.endswith('.xml'):
+                    archive.write(os.path.join(folder, name), name)
+        os.replace(tmp_path, archive_path)
+
+    def _get_full_article_limited(self, short_article, counter, semaphores):
+        """
+        Scrape single article while holding the semaphore of its host.
+        :param short_article: ShortArticle with basic article information
+        :param counter: position of the article in the list
+        :param semaphores: semaphore for each host
+        :return: Article class
+        """
+        with semaphores[urlparse(short_article.url).netloc]:
+            logging.info("%d. Get article: %s" % (counter, short_article.url))
+            return self._get_full_article(short_article)
 
     def _get_facebook_comments_API(self, **kwargs):
         """
@@ -185,41 +616,26 @@ class Scraper:
         :param url: url
         :return:
         """
-        comments = []
+        # Top comments of all pages are numbered as a single tree
+        comment_tree = CommentTree()
         target_id = self._get_facebook_id(kwargs['facebook_id'], kwargs['domain'], kwargs['url'])
         top_comments_url = constants.FACEBOOK_COMMENTS_URL_API.format(target_id)
         while True:
-            top_comments_response = requests.get(top_comments_url).content.decode('utf-8')
-            top_comments_counter = 0
+            top_comments_response = self._client.get(top_comments_url).content.decode('utf-8')
             top_comments_json = json.loads(top_comments_response)
             for top_comment in top_comments_json['data']:
-                top_comments_counter += 1
-                comments.append(self._get_facebook_comment(top_comment, top_comments_counter))
+                top_comment_local_id = comment_tree.add(top_comment['message'])
 
-                sub_comments_counter = 0
                 top_comment_id = top_comment['id']
                 sub_comments_url = constants.FACEBOOK_COMMENTS_URL_API.format(top_comment_id)
-                sub_comments_response = requests.get(sub_comments_url).content.decode('utf-8')
+                sub_comments_response = self._client.get(sub_comments_url).content.decode('utf-8')
                 for sub_comment in json.loads(sub_comments_response)['data']:
-                    sub_comments_counter += 1
-                    comments.append(self._get_facebook_comment(sub_comment, comment_id="%d-%d" % (
-                        top_comments_counter, sub_comments_counter), parent_comment_id=str(top_comments_counter)))
+                    comment_tree.add(sub_comment['message'], top_comment_local_id)
 
             try:
                 top_comments_url = top_comments_json['paging']['next']
             except KeyError:
-                return comments
-
-    def _get_facebook_comment(self, comment_json, comment_id, parent_comment_id=''):
-        """
-        Returns Comment object from comment json object Facebook returns.
-        :param comment_json: Facebook's json
-        :param comment_id: id of the comment
-        :param parent_comment_id: id of the parent
-        :return:
-        """
-        comment_text = comment_json['message']
-        return Comment(comment_id=str(comment_id), parent_comment_id=parent_comment_id, text=comment_text)
+                return comment_tree.comments
 
     def _get_facebook_id(self, facebook_id, domain, url):
         """
@@ -228,7 +644,7 @@ class Scraper:
         :param domain: site domain
         :return:
         """
-        top_comments_response = requests.get(
+        top_comments_response = self._client.get(
             constants.FACEBOOK_COMMENTS_URL.format(facebook_id, domain, url)).content.decode(
             'utf-8')
         # Get IDs of first-level comments
@@ -244,38 +660,57 @@ class Scraper:
         :param url: url
         :return:
         """
-        comments = []
-        fb_comments_response = requests.get(
+        fb_comments_response = self._client.get(
             self._comments_url.format(kwargs['facebook_id'], kwargs['domain'], kwargs['url'])).content.decode('utf-8')
         fb_comments_json = json.loads(
             re.search(r'handleServerJS\(({\"instances\".*)\);\}', fb_comments_response).group(1))
         target_fb_id = fb_comments_json['require'][2][3][0]['props']['meta']['targetFBID']
 
         fb_pager_url = "https://www.facebook.com/plugins/comments/async/{}/pager/time".format(target_fb_id)
-        top_comments_response = requests.post(fb_pager_url, data={'__a': 1, 'limit': 5000}).content.decode('utf-8')
+        top_comments_response = self._client.post(fb_pager_url, data={'__a': 1, 'limit': 5000}).content.decode('utf-8')
         top_comments_json = json.loads(re.search('({.*})', top_comments_response).group())
 
         top_comments_list = top_comments_json['payload']['commentIDs']
-        top_comments_counter = 0
-        for top_comment_id in top_comments_list:
-            top_comments_counter += 1
-            comments.append(Comment(comment_id=str(top_comments_counter),
-                                    parent_comment_id=',',
-                                    text=top_comments_json['payload']['idMap'][top_comment_id]['body']['text']))
-
-            sub_comments_url = 'https://www.facebook.com/plugins/comments/async/comment/{}/pager'.format(
-                top_comment_id)
-            sub_comments_response = requests.post(sub_comments_url, data={'__a': '1'}).content.decode('utf-8')
-            sub_comments_json = json.loads(re.search('({.*})', sub_comments_response).group())
-
-            sub_comments_counter = 0
-            for sub_comment_id in sub_comments_json['payload']['commentIDs']:
-                sub_comments_counter += 1
-                sub_comment_text = sub_comments_json['payload']['idMap'][sub_comment_id]['body']['text']
-                comments.append(Comment(comment_id="%d-%d" % (top_comments_counter, sub_comments_counter),
-                                        parent_comment_id=str(top_comments_counter),
-                                        text=sub_comment_text))
-        return comments
+        # Sub-comments of all top comments are requested concurrently, and numbered in the order of top comments
+        sub_comments_lists = self._map_concurrently(self._get_facebook_sub_comments, top_comments_list)
+        comment_tree = CommentTree()
+        for top_comment_id, sub_comments in zip(top_comments_list, sub_comments_lists):
+            top_comment_local_id = comment_tree.add(
+                top_comments_json['payload']['idMap'][top_comment_id]['body']['text'])
+            for sub_comment_text in sub_comments:
+                comment_tree.add(sub_comment_text, top_comment_local_id)
+        return comment_tree.comments
+
+    def _get_facebook_sub_comments(self, top_comment_id):
+        """
+        Returns texts of all replies to the Facebook comment.
+        :param top_comment_id: Facebook ID of the comment
+        :return: list of strings
+        """
+        sub_comments_url = 'https://www.facebook.com/plugins/comments/async/comment/{}/pager'.format(top_comment_id)
+        sub_comments_response = self._client.post(sub_comments_url, data={'__a': '1'}).content.decode('utf-8')
+        sub_comments_json = json.loads(re.search('({.*})', sub_comments_response).group())
+        return [sub_comments_json['payload']['idMap'][sub_comment_id]['body']['text']
+                for sub_comment_id in sub_comments_json['payload']['commentIDs']]
+
+    def _map_concurrently(self, function, items):
+        """
+        Call function for each item, at most COMMENT_WORKERS calls at the same time. If a call raises an exception,
+        calls that have not started yet are cancelled and the exception is raised.
+        :param function: function that takes single item
+        :param items: list of items
+        :return: list of results, in the order of items
+        """
+        if len(items) < 2:
+            return [function(item) for item in items]
+        with ThreadPoolExecutor(max_workers=min(constants.COMMENT_WORKERS, len(items))) as executor:
+            futures = [executor.submit(function, item) for item in items]
+            try:
+                return [future.result() for future in futures]
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
 
     @abc.abstractmethod
     def _get_keyword_number_of_pages(self, keyword, **kwargs):
@@ -298,9 +733,10 @@ class Scraper:
     @abc.abstractmethod
     def _get_full_article(self, short_article: ShortArticle):
         """
-        Scrape all information for the article.
+        Scrape all information for the article. Raises PermanentError if the article page can not be parsed, so the
+        article becomes a dead letter.
         :param short_article: ShortArticle with basic article information
-        :return: Article class
+        :return: Article class, None if the article is skipped, e.g. behind a pay-wall
         """
         raise NotImplemented("Please Implement this method.")
 
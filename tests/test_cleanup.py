@@ -0,0 +1,58 @@
+"""
+Regression fixtures of article text cleanup. Expected texts were written by the format_text methods that removed
+tags rule by rule, before cleanup rules were applied in a single traversal.
+"""
+
+import importlib
+import os
+
+import pytest
+from bs4 import BeautifulSoup
+
+from cleanup import Cleaner, Rule
+from main import scrapers
+
+DATA_FOLDER = os.path.join(os.path.dirname(__file__), 'data', 'cleanup')
+SITE_NAMES = ['Alo', 'Delo', 'Dnevnik', 'Kurir', 'Politika', 'Slovenske_novice', 'Srbija_danas', 'Svet24', 'Večer']
+
+
+def parse(markup):
+    return BeautifulSoup(markup, 'html.parser').find()
+
+
+@pytest.mark.parametrize('site_name', SITE_NAMES)
+def test_format_text_matches_fixture(site_name):
+    module_name, class_name = scrapers[site_name]
+    scraper = getattr(importlib.import_module(module_name), class_name)()
+    with open(os.path.join(DATA_FOLDER, '%s.html' % site_name), 'r', encoding='utf-8') as f:
+        root = parse(f.read())
+    with open(os.path.join(DATA_FOLDER, '%s.txt' % site_name), 'r', encoding='utf-8') as f:
+        expected = f.read()
+    assert scraper.format_text(root) == expected
+
+
+def test_kurir_paragraph_removed_with_outer_one_has_no_text():
+    # Nested "Kurir" paragraph followed by "Foto" would remove the rest of the article, if it was not removed already
+    root = parse('<div itemprop="articleBody"><p>Prvi pasus.</p><p>Pogledajte bonus video <p>Kurir</p></p>'
+                 '<p>Foto galerija ispod.</p><p>Tekst ostaje.</p></div>')
+    module_name, class_name = scrapers['Kurir']
+    scraper = getattr(importlib.import_module(module_name), class_name)()
+    assert scraper.format_text(root) == 'Prvi pasus.\nFoto galerija ispod.\nTekst ostaje.'
+
+
+def test_text_is_checked_without_tags_removed_by_earlier_rules():
+    root = parse('<div><a>x<blockquote>(foto)</blockquote></a><p>y</p></div>')
+    Cleaner([Rule('blockquote'), Rule('a', text=['(foto)'])]).clean(root)
+    assert str(root) == '<div><a>x</a><p>y</p></div>'
+
+
+def test_text_is_checked_with_tags_removed_by_later_rules():
+    root = parse('<div><h2>x<blockquote>(foto)</blockquote></h2><p>y</p></div>')
+    Cleaner([Rule('h2', text=['(foto)']), Rule('blockquote')]).clean(root)
+    assert str(root) == '<div><p>y</p></div>'
+
+
+def test_names_of_a_rule_are_applied_in_order():
+    root = parse('<div><a>Link <b>(VIDEO)</b></a><b>Tekst <a>(video)</a></b></div>')
+    Cleaner([Rule(['b', 'a'], text=['(video)'], ignore_case=True)]).clean(root)
+    assert str(root) == '<div><a>Link </a></div>'
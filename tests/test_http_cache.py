@@ -0,0 +1,101 @@
+"""
+HTTP cache against a local stand-in server that answers conditional requests.
+"""
+
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from http_cache import HttpCache
+from http_client import HttpClient
+
+PAGE_SIZE = 20000
+PAGES = 20
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """
+    Serves article pages with ETag, and counts body bytes sent.
+    """
+    # Path: page body
+    pages = {}
+    sent_bytes = 0
+
+    def do_GET(self):
+        body = self.pages[self.path]
+        etag = '"%s"' % hashlib.sha256(body).hexdigest()
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        StandInHandler.sent_bytes += len(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    StandInHandler.pages = {'/article/%d' % i: (b'<p>%d</p>' % i).ljust(PAGE_SIZE, b'x') for i in range(PAGES)}
+    StandInHandler.sent_bytes = 0
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield 'http://127.0.0.1:%d' % httpd.server_port
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def crawl(base_url, cache):
+    client = HttpClient(cache=cache)
+    try:
+        return [client.get('%s/article/%d' % (base_url, i)).content for i in range(PAGES)]
+    finally:
+        client.close()
+
+
+def test_recrawl_of_unchanged_pages_saves_bytes(server, tmp_path):
+    first = crawl(server, HttpCache(str(tmp_path), 10 * PAGE_SIZE * PAGES))
+    assert StandInHandler.sent_bytes == PAGE_SIZE * PAGES
+
+    # New cache object indexes entries of the previous run from the folder
+    cache = HttpCache(str(tmp_path), 10 * PAGE_SIZE * PAGES)
+    second = crawl(server, cache)
+    assert second == first
+    assert StandInHandler.sent_bytes == PAGE_SIZE * PAGES
+    assert cache.saved_bytes == PAGE_SIZE * PAGES
+
+
+def test_changed_page_is_downloaded_again(server, tmp_path):
+    crawl(server, HttpCache(str(tmp_path), 10 * PAGE_SIZE * PAGES))
+    StandInHandler.pages['/article/0'] = b'<p>changed</p>'.ljust(PAGE_SIZE, b'y')
+
+    cache = HttpCache(str(tmp_path), 10 * PAGE_SIZE * PAGES)
+    second = crawl(server, cache)
+    assert second[0] == StandInHandler.pages['/article/0']
+    assert StandInHandler.sent_bytes == PAGE_SIZE * (PAGES + 1)
+    assert cache.saved_bytes == PAGE_SIZE * (PAGES - 1)
+
+
+def test_least_recently_used_entries_are_evicted(server, tmp_path):
+    # Compressed pages are small, so only the last few fit
+    crawl(server, HttpCache(str(tmp_path), 1000))
+    StandInHandler.sent_bytes = 0
+
+    cache = HttpCache(str(tmp_path), 1000)
+    client = HttpClient(cache=cache)
+    client.get('%s/article/%d' % (server, PAGES - 1))
+    assert cache.saved_bytes == PAGE_SIZE
+    assert StandInHandler.sent_bytes == 0
+    client.get('%s/article/0' % server)
+    assert cache.saved_bytes == PAGE_SIZE
+    assert StandInHandler.sent_bytes == PAGE_SIZE
+    client.close()
@@ -0,0 +1,45 @@
+"""
+Tests of article XML output. Golden files were written by the ElementTree implementation that Article.write_xml
+replaced, so the output must stay byte for byte the same.
+"""
+
+import os
+
+from model import Article, Comment, ShortArticle
+
+DATA_FOLDER = os.path.join(os.path.dirname(__file__), 'data')
+
+
+def make_article(comments):
+    short_article = ShortArticle('језик', 'https://www.politika.rs/sr/clanak/42/jezik?a=1&b=2', 'Језик и "писмо" <данас>',
+                                 '2019-05-01', 'Politika', 'sr-01-42')
+    text = "Први пасус & други.\nДруги ред са <b>ознаком</b> и &amp; ентитетом.\n\t'Наводници' и ћирилица: Љ Њ Џ ђ ж"
+    return Article(short_article, text, ' Петар Петровић ', comments)
+
+
+def make_comments():
+    return [Comment('1', '', 'Коментар &amp; одговор\n'), Comment('1-1', '1', 'Одговор "са наводницима" <x>'),
+            Comment('1-1-1', '1-1', 'Reply in latin &quot;text&quot;'), Comment('2', '', 'Трећи\r\nред  ')]
+
+
+def read_golden(file_name):
+    with open(os.path.join(DATA_FOLDER, file_name), 'rb') as f:
+        return f.read()
+
+
+def test_save_to_file_matches_golden_file(tmp_path):
+    file_path = os.path.join(str(tmp_path), 'sr-01-42.xml')
+    make_article(make_comments()).save_to_file(file_path)
+    with open(file_path, 'rb') as f:
+        assert f.read() == read_golden('article.xml')
+
+
+def test_article_without_comments_matches_golden_file(tmp_path):
+    file_path = os.path.join(str(tmp_path), 'sr-01-42.xml')
+    make_article([]).save_to_file(file_path)
+    with open(file_path, 'rb') as f:
+        assert f.read() == read_golden('article_without_comments.xml')
+
+
+def test_convert_to_xml_matches_save_to_file():
+    assert make_article(make_comments()).convert_to_xml().encode('utf-8') == read_golden('article.xml')
@@ -0,0 +1,103 @@
+"""
+Compatibility of lxml with html.parser. Article texts and search result pages must be read the same with both parsers.
+Search result pages are written with the markup that each site's parser reads, surrounded by typical malformed markup.
+"""
+
+import importlib
+import os
+from datetime import datetime
+
+import pytest
+from bs4 import BeautifulSoup
+
+import constants
+from main import scrapers
+
+pytest.importorskip('lxml')
+
+DATA_FOLDER = os.path.join(os.path.dirname(__file__), 'data')
+PARSERS = ['html.parser', 'lxml']
+ARTICLE_SITE_NAMES = ['Alo', 'Delo', 'Dnevnik', 'Kurir', 'Politika', 'Slovenske_novice', 'Srbija_danas', 'Svet24',
+                      'Večer']
+SEARCH_SITE_NAMES = ['Alo', 'Delo', 'Kurir', 'Politika', 'Slovenske_novice', 'Srbija_danas', 'Svet24', 'Večer']
+# Search result pages of sites that search by year are read for this window
+WINDOW = (datetime(2017, 1, 1), datetime(2020, 1, 1))
+
+
+class Response:
+    """
+    Response with the page.
+    """
+
+    def __init__(self, content):
+        self.content = content
+        self.status_code = 200
+
+
+class Client:
+    """
+    Returns the same page for every URL.
+    """
+
+    def __init__(self, content):
+        self._content = content
+
+    def get(self, url, **kwargs):
+        return Response(self._content)
+
+
+def create_scraper(site_name):
+    module_name, class_name = scrapers[site_name]
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+def format_article(site_name, parser):
+    """
+    Returns text of the article fixture of the site, parsed with the given parser.
+    """
+    with open(os.path.join(DATA_FOLDER, 'cleanup', '%s.html' % site_name), 'r', encoding='utf-8') as f:
+        soup = BeautifulSoup(f.read(), parser)
+    # lxml wraps the fragment into html and body
+    root = soup.find(lambda tag: tag.name not in ('html', 'body'))
+    return create_scraper(site_name).format_text(root)
+
+
+def read_search_page(site_name, parser, monkeypatch):
+    """
+    Returns articles found on the search result page fixture of the site, whether paging stops, and number of pages,
+    read with the given parser.
+    """
+    monkeypatch.setattr(constants, 'HTML_PARSER', parser)
+    scraper = create_scraper(site_name)
+    # Dates of Alo results are relative to today
+    scraper._min_date, scraper._max_date = datetime.min, datetime.max
+    with open(os.path.join(DATA_FOLDER, 'search', '%s.html' % site_name), 'rb') as f:
+        scraper._client = Client(f.read())
+    articles, stop_iteration = scraper._get_articles_list('korona', 1, window=WINDOW)
+    # Alo pages until results run out
+    pages = scraper._get_keyword_number_of_pages('korona', window=WINDOW) if site_name != 'Alo' else None
+    return [(article.url, article.title, article.time) for article in articles], stop_iteration, pages
+
+
+def test_default_parser_is_lxml():
+    assert constants.HTML_PARSER == 'lxml'
+
+
+@pytest.mark.parametrize('site_name', ARTICLE_SITE_NAMES)
+def test_article_text_is_the_same_with_both_parsers(site_name):
+    texts = [format_article(site_name, parser) for parser in PARSERS]
+    assert texts[0] != ''
+    assert texts[1] == texts[0]
+
+
+@pytest.mark.parametrize('site_name', SEARCH_SITE_NAMES)
+def test_search_page_is_read_the_same_with_both_parsers(site_name, monkeypatch):
+    results = [read_search_page(site_name, parser, monkeypatch) for parser in PARSERS]
+    assert len(results[0][0]) == 3
+    assert results[1] == results[0]
+
+
+@pytest.mark.parametrize('parser', PARSERS)
+def test_nested_paragraph_starts_in_new_line(parser):
+    root = BeautifulSoup('<div><p>a<p>b</p>c</p><p>d</p></div>', parser).find('div')
+    assert create_scraper('Delo').format_text(root) == 'a\nbc\nd'
@@ -0,0 +1,45 @@
+"""
+Equivalence of transliteration.to_latin and translit(text, 'sr', reversed=True) of transliterate package, which it
+replaced.
+"""
+
+import glob
+import os
+import pickle
+
+import pytest
+
+from transliteration import to_latin
+
+translit = pytest.importorskip('transliterate').translit
+
+ROOT_FOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_titles():
+    titles = []
+    for file_path in sorted(glob.glob(os.path.join(ROOT_FOLDER, '*', 'data', 'news_list'))):
+        with open(file_path, 'rb') as f:
+            titles.extend(article.title for article in pickle.load(f))
+    return titles
+
+
+def test_cyrillic_block_matches_transliterate():
+    characters = [chr(code) for code in range(0x0400, 0x0500)]
+    for character in characters:
+        assert to_latin(character) == translit(character, 'sr', reversed=True)
+    # Digraphs next to upper and lower case letters
+    for text in ('Љубав', 'ЉУБАВ', 'Њива', 'ЊИВА', 'Џеп', 'ЏЕП', 'љ Њ џ', ''.join(characters)):
+        assert to_latin(text) == translit(text, 'sr', reversed=True)
+
+
+def test_corpus_titles_match_transliterate():
+    titles = load_titles()
+    assert titles
+    differences = [title for title in titles if to_latin(title) != translit(title, 'sr', reversed=True)]
+    assert differences == []
+
+
+def test_latin_text_is_returned_unchanged():
+    text = 'Slovenščina in "jezik" & <b>'
+    assert to_latin(text) is text
@@ -0,0 +1,64 @@
+"""
+Extraction of plain article text from a BeautifulSoup tree.
+"""
+
+import re
+
+from bs4 import NavigableString, Tag
+
+_new_lines = re.compile(r'\n{2,}')
+
+# Marks the end of paragraph content on the traversal stack
+_PARAGRAPH_END = object()
+
+
+class TextExtractor:
+    """
+    Serializes article tag to plain text in a single traversal of the tree. Skip tags are left out together with
+    their content, each <br> becomes a new line and each paragraph, nested or not, starts in a new line, so the text
+    is the same whether the page was parsed with html.parser or lxml. Blank lines are collapsed and the result is
+    stripped. The tree is not modified.
+    """
+
+    def __init__(self, skip_tags=(), flatten_paragraphs=False):
+        """
+        Constructor.
+        :param skip_tags: names of tags that are left out together with their content
+        :param flatten_paragraphs: paragraph is taken as its plain text: <br> inside it does not start a new line,
+        and text of skip tags inside it is kept
+        """
+        self._skip_tags = frozenset(skip_tags)
+        self._flatten_paragraphs = flatten_paragraphs
+
+    def extract(self, root):
+        """
+        Returns text of the tag. Only strings that root.text would return are taken.
+        :param root: BeautifulSoup tag
+        :return: text
+        """
+        types = root.interesting_string_types or Tag.MAIN_CONTENT_STRING_TYPES
+        parts = []
+        paragraph_depth = 0
+        stack = list(reversed(root.contents))
+        while stack:
+            node = stack.pop()
+            if node is _PARAGRAPH_END:
+                paragraph_depth -= 1
+                continue
+            if isinstance(node, NavigableString):
+                if type(node) in types:
+                    parts.append(node)
+                continue
+            if not (paragraph_depth and self._flatten_paragraphs):
+                if node.name in self._skip_tags:
+                    continue
+                if node.name == 'br':
+                    parts.append('\n')
+                    continue
+            if node.name == 'p':
+                # Nested paragraph starts in a new line too, as lxml and browsers close the outer one before it
+                parts.append('\n')
+                paragraph_depth += 1
+                stack.append(_PARAGRAPH_END)
+            stack.extend(reversed(node.contents))
+        return _new_lines.sub('\n', ''.join(parts)).strip()
@@ -0,0 +1,34 @@
+"""
+Serbian Cyrillic to Latin transliteration.
+"""
+
+import re
+from functools import lru_cache
+
+# Strings up to this length (titles, authors, short comments) are cached
+CACHED_LENGTH = 256
+
+_translation_table = str.maketrans('абвгдђежзијклмнопрстћуфхцчшАБВГДЂЕЖЗИЈКЛМНОПРСТЋУФХЦЧШ',
+                                   'abvgdđežzijklmnoprstćufhcčšABVGDĐEŽZIJKLMNOPRSTĆUFHCČŠ')
+_translation_table.update({ord('љ'): 'lj', ord('њ'): 'nj', ord('џ'): 'dž',
+                           ord('Љ'): 'Lj', ord('Њ'): 'Nj', ord('Џ'): 'Dž'})
+_cyrillic = re.compile('[Ѐ-ӿ]')
+
+
+def to_latin(text):
+    """
+    Transliterate Serbian Cyrillic text to Latin. Gives the same result as translit(text, 'sr', reversed=True) of
+    transliterate package. Text without Cyrillic characters is returned as it is.
+    :param text: text
+    :return: transliterated text
+    """
+    if text.isascii() or _cyrillic.search(text) is None:
+        return text
+    if len(text) <= CACHED_LENGTH:
+        return _to_latin_cached(text)
+    return text.translate(_translation_table)
+
+
+@lru_cache(maxsize=65536)
+def _to_latin_cached(text):
+    return text.translate(_translation_table)
@@ -6,15 +6,16 @@ import logging
 from datetime import datetime
 from math import ceil
 
-import requests
-from bs4 import BeautifulSoup
 from selenium import webdriver
 from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.support.wait import WebDriverWait
 
 import constants
-from model import ShortArticle, Article, Comment
+from cleanup import Rule
+from model import ShortArticle, Article, CommentTree
+from retry import TransientError
 from scraper import Scraper
+from text_extraction import TextExtractor
 
 logging.basicConfig(level=logging.INFO,
                     format='%(asctime)s - %(levelname)s - %(message)s',
@@ -27,10 +28,30 @@ class ScraperUr24(Scraper):
     """
     Scraper class for 24ur news.
     """
+    # Tags removed from article text
+    _cleanup_rules = [
+        Rule('div', class_='ArticleImage-description'),
+        Rule('div', class_='videos'),
+        Rule('div', class_='label--ad-banner'),
+        Rule('div', class_='gallery'),
+        Rule('img'),
+    ]
+    # Paragraphs are taken as their plain text, without line breaks
+    _text_extractor = TextExtractor(constants.skip_tags, flatten_paragraphs=True)
+    # Search and article pages are loaded with Selenium, only comment responses are stored
+    _replay_supported = False
 
     def __init__(self):
         site_name = 'ur24'
         super().__init__(site_name)
+        # Selenium driver is shared, so articles are scraped one at a time
+        self._max_workers = 1
+
+    @Scraper.max_workers.setter
+    def max_workers(self, max_workers):
+        if max_workers > 1:
+            logging.warning("24ur shares a single Selenium driver, scraping with 1 worker instead of %d." % max_workers)
+        Scraper.max_workers.fset(self, 1)
 
     def _get_keyword_number_of_pages(self, keyword, **kwargs):
         driver.get(self._generic_url.format(keyword, 1))
@@ -66,9 +87,9 @@ class ScraperUr24(Scraper):
             date = datetime.strptime(str_date.text, '%d.%m.%Y, %H:%M') if len(
                 str_date.text.split(',')) > 1 else datetime.strptime(str_date.text, '%d.%m.%Y')
 
-            if date >= constants.MAX_DATE:
+            if date >= self._max_date:
                 continue
-            if date < constants.MIN_DATE:
+            if date < self._min_date:
                 return articles, True
 
             articles.append(ShortArticle(keyword=keyword, url=article_url, title=title, time=date.strftime('%Y-%m-%d'),
@@ -83,7 +104,7 @@ class ScraperUr24(Scraper):
             WebDriverWait(driver, 3).until(
                 lambda x: x.find_element_by_class_name('article__body'))
             html = driver.page_source
-            soup = BeautifulSoup(html, 'html.parser')
+            soup = self._parse_html(html)
             text = self.get_formatted_article(text=soup.find('div', class_='article__body'))
             # text = driver.find_element_by_class_name('article__body').text
             author = driver.find_element_by_class_name('article__details-main').text
@@ -91,8 +112,8 @@ class ScraperUr24(Scraper):
             comments = self._get_comments(article_id)
             full_article = Article(short_article, text, author, comments)
             return full_article
-        except TimeoutException:
-            logging.error('%s' % url)
+        except TimeoutException as e:
+            raise TransientError("Article page did not load: %s" % url) from e
 
     def _get_comments(self, article_id=None):
         headers = {"content-type": "application/graphql"}
@@ -100,81 +121,23 @@ class ScraperUr24(Scraper):
                    "id body replies {id body}}}}"
         page = 1
         per_page = 100
-        comments = []
+        # Comments of all pages are numbered as a single tree
+        comment_tree = CommentTree()
         while True:
-            response = requests.post(self._comments_url, data=raw_body % (article_id, page, per_page),
-                                     headers=headers)
+            response = self._client.post(self._comments_url, data=raw_body % (article_id, page, per_page),
+                                         headers=headers)
             if response.status_code != 200:
                 logging.error("Error loading comments page %d." %
                               page)
-                return comments
+                return comment_tree.comments
             response = json.loads(response.content.decode('utf-8'))
             total_comments = int(response['data']['comments']['total'])
 
             # If there is no comment return
             if len(response['data']['comments']['comments']) == 0:
-                return comments
-            # If first iteration comment_id = 1, otherwise last comment id increased by 1
-            comment_id = 1 if len(comments) == 0 else int(comments[-1].id.split('-')[0]) + 1
-            # Get comments
-            comments.extend(self._load_comments(comments=response['data']['comments']['comments'],
-                                                comment_id=str(comment_id)))
+                return comment_tree.comments
+            # Each comment is followed by its replies
+            comment_tree.add_tree(response['data']['comments']['comments'], lambda comment: comment['body'],
+                                  lambda comment: comment.get('replies'))
 
             page += 1
-
-    def _load_comments(self, comments, comments_list=None, comment_id="1", parent_comment_id=''):
-        """
-        Load all comments recursively.
-        :param comments: list of comments on same level that need to be processed
-        :param comments_list: output list of Comment objects
-        :param comment_id: current comment id (integer that represents number of current comment)
-        :param parent_comment_id: id of comment parent (x-y-z)
-        :return:
-        """
-        if comments_list is None:
-            comments_list = []
-        if len(comments) > 0:
-            # Get first comment
-            comment = comments.pop(0)
-            # Build comment ID
-            c_id = "%s-%s" % (parent_comment_id, comment_id) if parent_comment_id else comment_id
-            # Comment parent ID
-            c_parent_id = parent_comment_id
-
-            comments_list.append(Comment(c_id, c_parent_id, comment['body']))
-
-            if 'replies' in comment and len(comment['replies']) > 0:
-                c_parent_id = 0 if not c_parent_id else c_parent_id
-                # If comment contains replies, process all replies
-                # parent_comment_id is current comment id, comment_id is 1
-                self._load_comments(comments=comment['replies'], comments_list=comments_list,
-                                    parent_comment_id=c_id)
-
-            # If comment doesn't contain replies, process the rest of the list
-            # Parent is the same, comment_id is increased by one
-            return self._load_comments(comments=comments, comments_list=comments_list,
-                                       comment_id=str(int(comment_id) + 1), parent_comment_id=c_parent_id)
-        else:
-            return comments_list
-
-    def format_text(self, text):
-        """
-        Format XML text.
-        :param text:
-        :return:
-        """
-        for tag in text.findAll('div', class_='ArticleImage-description'):
-            tag.decompose()
-        for tag in text.findAll('div', class_='videos'):
-            tag.decompose()
-        for tag in text.findAll('div', class_='label--ad-banner'):
-            tag.decompose()
-        for tag in text.findAll('div', class_='gallery'):
-            tag.decompose()
-        for tag in text.findAll('img'):
-            tag.decompose()
-
-        for tag in text.findAll('p'):
-            tag.string = "\n%s" % tag.text
-        cleared = super().format_text(text)
-        return cleared